@@ -0,0 +1,135 @@
+import os
+from typing import Any, Callable, Dict, Optional
+
+import engine
+from formulary import formulary_index
+from knowledge_base import KnowledgeBase, get_knowledge_base
+from models import TextAnalysisRequest
+from tenants import TENANT_HEADER, TenantRegistry, load_tenants
+from timeline import EXPOSURE_WINDOW_HOURS, MAX_WINDOW_HOURS
+
+# "remote" calls the API over HTTP, "embedded" runs the engine in this process
+ANALYSIS_MODE = os.environ.get("MEDISAFE_MODE", "remote")
+API_BASE_URL = os.environ.get("MEDISAFE_API_URL", "http://localhost:8000")
+
+# Endpoint name -> engine function, for the endpoints that take a patient profile
+PROFILE_ENDPOINTS: Dict[str, Callable[[Any], Any]] = {
+    "analyze-interactions": engine.analyze_interactions,
+    "dosage-recommendations": engine.dosage_recommendations,
+    "alternative-medications": engine.alternative_medications,
+    "contraindications": engine.screen_contraindications,
+    "dosing-timeline": engine.dosing_timeline,
+    "safe-to-add": engine.safe_to_add,
+    "comprehensive-analysis": engine.comprehensive_analysis,
+}
+
+
+class AnalysisError(Exception):
+    pass
+
+
+def _drug_class(kb: KnowledgeBase, value) -> str:
+    if str(value).lower() not in formulary_index(kb).class_masks:
+        raise AnalysisError(f"Unknown drug class {value}")
+    return str(value)
+
+
+def _window_hours(kb: KnowledgeBase, value) -> float:
+    hours = float(value)
+    if not EXPOSURE_WINDOW_HOURS <= hours <= MAX_WINDOW_HOURS:
+        raise AnalysisError(f"window_hours must be between {EXPOSURE_WINDOW_HOURS} and {MAX_WINDOW_HOURS}")
+    return hours
+
+
+# Endpoint name -> query parameter -> check and conversion, as the API applies them
+ENDPOINT_PARAMS: Dict[str, Dict[str, Callable[[KnowledgeBase, Any], Any]]] = {
+    "safe-to-add": {"drug_class": _drug_class},
+    "dosing-timeline": {"window_hours": _window_hours},
+}
+
+
+class AnalysisClient:
+    """Call the analysis endpoints by name, over HTTP or in-process.
+
+    Both modes take and return the same JSON-shaped data, so callers switch
+    between them with `mode` (or MEDISAFE_MODE) alone. Query parameters go
+    in `params`, and an X-Tenant-ID header selects the tenant's overlay in
+    either mode (embedded mode reads the same tenants file as the API).
+    """
+
+    def __init__(self, mode: Optional[str] = None, base_url: Optional[str] = None):
+        self.mode = mode or ANALYSIS_MODE
+        if self.mode not in ("remote", "embedded"):
+            raise ValueError(f"Unknown analysis mode {self.mode!r}, expected 'remote' or 'embedded'")
+        self.base_url = base_url or API_BASE_URL
+        self._tenants: Optional[TenantRegistry] = None
+
+    @property
+    def embedded(self) -> bool:
+        return self.mode == "embedded"
+
+    def call(self, endpoint: str, data: dict, headers: Optional[dict] = None, params: Optional[dict] = None) -> Any:
+        if self.embedded:
+            return self._call_embedded(endpoint, data, headers or {}, params or {})
+        return self._call_remote(endpoint, data, headers, params)
+
+    def _knowledge_base(self, headers: dict) -> KnowledgeBase:
+        """The base knowledge base, or the tenant's overlay when the tenant header is set."""
+        tenant_id = next((value for name, value in headers.items() if name.lower() == TENANT_HEADER.lower()), None)
+        if tenant_id is None:
+            return get_knowledge_base()
+        if self._tenants is None:
+            self._tenants = load_tenants()
+        try:
+            return self._tenants.knowledge_base(tenant_id, get_knowledge_base())
+        except KeyError:
+            raise AnalysisError(f"Unknown tenant {tenant_id}")
+
+    def _call_embedded(self, endpoint: str, data: dict, headers: dict, params: dict) -> Any:
+        from pydantic import ValidationError
+
+        try:
+            allowed = ENDPOINT_PARAMS.get(endpoint, {})
+            unknown = set(params) - set(allowed)
+            if unknown:
+                raise AnalysisError(f"Unknown parameter(s) {sorted(unknown)} for endpoint {endpoint!r}")
+            if endpoint == "extract-drugs":
+                return engine.extract_drugs(data.get("text", ""))
+            kb = self._knowledge_base(headers)
+            if endpoint == "analyze-text":
+                request = TextAnalysisRequest.model_validate(data)
+                return engine.analyze_text(request.text, request.age, request.medical_conditions, request.weight_kg,
+                                           kb)
+            if endpoint == "dispense-gate":
+                return engine.dispense_gate(data, kb)
+            if endpoint not in PROFILE_ENDPOINTS:
+                raise AnalysisError(f"No embedded handler for endpoint {endpoint!r}")
+            kwargs = {name: allowed[name](kb, value) for name, value in params.items()}
+            return PROFILE_ENDPOINTS[endpoint](engine.as_profile(data), kb=kb, **kwargs)
+        except (ValidationError, ValueError) as e:
+            raise AnalysisError(str(e)) from e
+
+    def _call_remote(self, endpoint: str, data: dict, headers: Optional[dict], params: Optional[dict]) -> Any:
+        import requests
+
+        try:
+            response = requests.post(f"{self.base_url}/{endpoint}", json=data, headers=headers or {},
+                                     params=params or {})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise AnalysisError(str(e)) from e
+
+
+def add_client_arguments(parser):
+    """--remote/--embedded/--api-url for scripts; without a flag, MEDISAFE_MODE decides as for the frontend."""
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--remote", dest="mode", action="store_const", const="remote",
+                      help="Call the API server")
+    mode.add_argument("--embedded", dest="mode", action="store_const", const="embedded",
+                      help="Run the analysis engine in this process")
+    parser.add_argument("--api-url", default=None, help=f"API server in remote mode (default {API_BASE_URL})")
+
+
+def client_from_args(args) -> AnalysisClient:
+    return AnalysisClient(mode=args.mode, base_url=args.api_url)
@@ -0,0 +1,81 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional
+
+
+def normalize_condition(condition: str) -> str:
+    """Lower-case a condition and reduce punctuation and spacing to single spaces."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", condition.lower()).split())
+
+
+class ConditionIndex:
+    """Inverted index from condition to the drugs it contraindicates.
+
+    Drug classes are expanded to their member drugs when the index is
+    built, so screening a patient is one lookup per condition.
+    """
+
+    def __init__(self, synonyms: Dict[str, str], index: Dict[str, Dict[str, List[dict]]]):
+        self.synonyms = synonyms
+        self.index = index
+
+    def canonical(self, condition: str) -> Optional[str]:
+        return self.synonyms.get(normalize_condition(condition))
+
+    def screen(self, conditions: Iterable[str], drug_names: Iterable[str]) -> List[dict]:
+        drugs = set(drug_names)
+        findings = []
+        seen = set()
+        for condition in conditions:
+            canonical = self.canonical(condition)
+            if canonical is None or canonical in seen:
+                continue
+            seen.add(canonical)
+            contraindicated = self.index.get(canonical, {})
+            for drug in sorted(contraindicated.keys() & drugs):
+                for rule in contraindicated[drug]:
+                    findings.append({
+                        "condition": canonical,
+                        "drug": drug,
+                        "severity": rule["severity"],
+                        "reason": rule["reason"],
+                        "matched_by": rule["matched_by"]
+                    })
+        return findings
+
+
+def build_condition_index(spec: dict, drug_classes: Dict[str, List[str]]) -> ConditionIndex:
+    """Build the condition vocabulary and inverted index (see data/contraindications.json)."""
+    synonyms = {}
+    for canonical, names in spec["conditions"].items():
+        synonyms[normalize_condition(canonical)] = canonical
+        for name in names:
+            synonyms[normalize_condition(name)] = canonical
+
+    class_members: Dict[str, List[str]] = {}
+    for drug, classes in drug_classes.items():
+        for drug_class in classes:
+            class_members.setdefault(drug_class, []).append(drug)
+
+    index: Dict[str, Dict[str, List[dict]]] = {}
+    for rule in spec["contraindications"]:
+        condition = rule["condition"]
+        if condition not in spec["conditions"]:
+            raise ValueError(f"Contraindication for unknown condition {condition!r}")
+
+        entries = index.setdefault(condition, {})
+        matches = [(drug.lower(), "drug") for drug in rule.get("drugs", [])]
+        for drug_class in rule.get("drug_classes", []):
+            matches.extend((drug, drug_class) for drug in class_members.get(drug_class, []))
+        for drug, matched_by in matches:
+            entries.setdefault(drug, []).append({
+                "severity": rule["severity"],
+                "reason": rule["reason"],
+                "matched_by": matched_by
+            })
+    return ConditionIndex(synonyms, index)
+
+
+def load_condition_index(path: str, drug_classes: Dict[str, List[str]]) -> ConditionIndex:
+    with open(path, encoding="utf-8") as f:
+        return build_condition_index(json.load(f), drug_classes)
@@ -0,0 +1,133 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Ages above this share the last row of the age lookup table
+MAX_AGE = 150
+
+
+class DosageTables:
+    """Dosage rules compiled into flat decision tables.
+
+    Rows are drugs, columns are age bands. `band_by_age` maps every age to
+    its column and `age_warnings` holds the age-triggered warnings for every
+    age, so evaluating a regimen is a handful of list lookups per drug.
+    """
+
+    def __init__(self, band_names: List[str], band_by_age: List[int], drug_index: Dict[str, int],
+                 recommended: List[List[Optional[str]]], max_daily: List[List[float]],
+                 max_daily_per_kg: List[List[float]], drug_warnings: List[List[Tuple[str, ...]]],
+                 age_warnings: List[Tuple[str, ...]], weight_warnings: List[tuple]):
+        self.band_names = band_names
+        self.band_by_age = band_by_age
+        self.drug_index = drug_index
+        self.recommended_table = recommended
+        self.max_daily_table = max_daily
+        self.max_daily_per_kg_table = max_daily_per_kg
+        self.drug_warnings_table = drug_warnings
+        self.age_warnings_table = age_warnings
+        # (min_age, max_age, min_weight_kg, max_weight_kg, message), only checked when weight is known
+        self.weight_warnings = weight_warnings
+
+    def band(self, age: int) -> int:
+        return self.band_by_age[min(max(age, 0), MAX_AGE)]
+
+    def band_name(self, age: int) -> str:
+        return self.band_names[self.band(age)]
+
+    def covers(self, drug_name: str) -> bool:
+        return drug_name in self.drug_index
+
+    def recommended(self, drug_name: str, age: int) -> Optional[str]:
+        row = self.drug_index.get(drug_name)
+        if row is None:
+            return None
+        return self.recommended_table[row][self.band(age)]
+
+    def max_daily(self, drug_name: str, age: int, weight_kg: Optional[float] = None) -> float:
+        """Maximum daily dose in mg for the patient, 0 when there is no limit."""
+        row = self.drug_index.get(drug_name)
+        if row is None:
+            return 0
+        band = self.band(age)
+        limit = self.max_daily_table[row][band]
+        per_kg = self.max_daily_per_kg_table[row][band]
+        if per_kg and weight_kg:
+            weight_limit = per_kg * weight_kg
+            limit = min(limit, weight_limit) if limit else weight_limit
+        return limit
+
+    def age_warnings(self, age: int) -> Tuple[str, ...]:
+        return self.age_warnings_table[min(max(age, 0), MAX_AGE)]
+
+    def patient_warnings(self, age: int, weight_kg: Optional[float] = None) -> List[str]:
+        warnings = list(self.age_warnings(age))
+        if weight_kg:
+            for min_age, max_age, min_weight, max_weight, message in self.weight_warnings:
+                if min_age <= age <= max_age and min_weight <= weight_kg <= max_weight:
+                    warnings.append(message)
+        return warnings
+
+    def drug_warnings(self, drug_name: str, age: int) -> Tuple[str, ...]:
+        row = self.drug_index.get(drug_name)
+        if row is None:
+            return ()
+        return self.drug_warnings_table[row][self.band(age)]
+
+
+def _age_range(rule: dict) -> Tuple[int, int]:
+    return rule.get("min_age", 0), rule.get("max_age", MAX_AGE)
+
+
+def compile_dosage_rules(spec: dict) -> DosageTables:
+    """Compile the declarative rule format (see data/dosage_rules.json) into decision tables."""
+    bands = spec["age_bands"]
+    band_names = [band["name"] for band in bands]
+    band_columns = {name: i for i, name in enumerate(band_names)}
+
+    band_by_age = []
+    column = 0
+    for age in range(MAX_AGE + 1):
+        while column < len(bands) - 1 and age > bands[column].get("max_age", MAX_AGE):
+            column += 1
+        band_by_age.append(column)
+
+    age_warnings = []
+    weight_warnings = []
+    for rule in spec.get("warnings", []):
+        min_age, max_age = _age_range(rule)
+        if "min_weight_kg" in rule or "max_weight_kg" in rule:
+            weight_warnings.append((min_age, max_age, rule.get("min_weight_kg", 0),
+                                    rule.get("max_weight_kg", float("inf")), rule["message"]))
+        else:
+            age_warnings.append((min_age, max_age, rule["message"]))
+    age_warnings_table = [
+        tuple(message for min_age, max_age, message in age_warnings if min_age <= age <= max_age)
+        for age in range(MAX_AGE + 1)
+    ]
+
+    drug_index = {}
+    recommended, max_daily, max_daily_per_kg, drug_warnings = [], [], [], []
+    for drug_name, drug_rules in spec.get("drugs", {}).items():
+        unknown = set(drug_rules) - set(band_columns)
+        if unknown:
+            raise ValueError(f"Unknown age band(s) {sorted(unknown)} in dosage rules for {drug_name}")
+
+        drug_index[drug_name.lower()] = len(recommended)
+        recommended.append([None] * len(bands))
+        max_daily.append([0] * len(bands))
+        max_daily_per_kg.append([0] * len(bands))
+        drug_warnings.append([()] * len(bands))
+        for band_name, rule in drug_rules.items():
+            column = band_columns[band_name]
+            recommended[-1][column] = rule.get("dosage")
+            max_daily[-1][column] = rule.get("max_daily", 0)
+            max_daily_per_kg[-1][column] = rule.get("max_daily_mg_per_kg", 0)
+            drug_warnings[-1][column] = tuple(rule.get("warnings", []))
+
+    return DosageTables(band_names, band_by_age, drug_index, recommended, max_daily,
+                        max_daily_per_kg, drug_warnings, age_warnings_table, weight_warnings)
+
+
+def load_dosage_rules(path: str) -> DosageTables:
+    with open(path, encoding="utf-8") as f:
+        return compile_dosage_rules(json.load(f))
@@ -0,0 +1,357 @@
+"""In-process analysis engine.
+
+This is the library behind the HTTP API: every endpoint is a thin wrapper
+around one of these functions, so callers in the same process (the
+frontend in embedded mode, batch scripts) get identical results without an
+HTTP hop. Profiles can be passed as `PatientProfile` models or plain dicts,
+which are validated with the same model the API uses. Every function takes
+an optional knowledge base and defaults to the process-wide one.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from contraindications import normalize_condition
+from extraction import extract_drugs, mention_to_drug, scan_drug_mentions, select_mentions
+from formulary import screen_candidates
+from gate import check_dispense, parse_gate_request
+from knowledge_base import KnowledgeBase, get_knowledge_base
+from models import DrugInput, PatientProfile
+from timeline import EXPOSURE_WINDOW_HOURS, dosing_timelines
+from tracing import tracer
+
+__all__ = [
+    "PatientProfile", "KnowledgeBase", "as_profile", "get_age_group", "ingredient_exposure", "check_overdosage",
+    "analyze_interactions", "dosage_recommendations", "alternative_medications",
+    "screen_contraindications", "dosing_timeline", "overdose_warnings", "safe_to_add",
+    "formulary_restrictions", "dispense_gate", "comprehensive_analysis", "profile_from_text", "analyze_extracted",
+    "analyze_text",
+    "profile_fingerprint", "extract_drugs",
+]
+
+ProfileLike = Union[PatientProfile, dict]
+
+
+def as_profile(patient: ProfileLike) -> PatientProfile:
+    if isinstance(patient, PatientProfile):
+        return patient
+    return PatientProfile.model_validate(patient)
+
+
+def get_age_group(age: int, kb: Optional[KnowledgeBase] = None) -> str:
+    kb = kb or get_knowledge_base()
+    return kb.dosage_tables.band_name(age)
+
+
+def ingredient_exposure(patient: ProfileLike, kb: Optional[KnowledgeBase] = None) -> List[dict]:
+    """Peak rolling 24h exposure per active ingredient; every overdose check reads these rows"""
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    return dosing_timelines([patient.model_dump()], EXPOSURE_WINDOW_HOURS, kb.products,
+                            kb.dosage_tables.max_daily)[0]
+
+
+def _overdose_warning(exposure: dict) -> dict:
+    sources = exposure["sources"]
+    via = "" if sources == [exposure["ingredient"]] else f" from {', '.join(sources)}"
+    return {
+        "drug": exposure["ingredient"],
+        "warning": f"OVERDOSE: {exposure['peak_24h_mg']:g}mg/day{via} exceeds {exposure['max_daily_mg']:g}mg/day",
+        "estimated_daily": exposure["peak_24h_mg"],
+        "max_safe": exposure["max_daily_mg"],
+        "sources": sources
+    }
+
+
+def _overdoses_by_drug(exposures: List[dict]) -> Dict[str, List[dict]]:
+    """Overdose warnings by the regimen entries contributing to them"""
+    by_drug: Dict[str, List[dict]] = {}
+    for exposure in exposures:
+        if exposure["is_overdose"]:
+            warning = _overdose_warning(exposure)
+            for source in exposure["sources"]:
+                by_drug.setdefault(source, []).append(warning)
+    return by_drug
+
+
+def check_overdosage(drug_name: str, dosage: str, frequency: str, age: int,
+                     weight_kg: Optional[float] = None, kb: Optional[KnowledgeBase] = None) -> dict:
+    """Overdose check of one entry on its own, by the same rolling exposure as the regimen checks"""
+    kb = kb or get_knowledge_base()
+    regimen = {"age": age, "weight_kg": weight_kg,
+               "drugs": [{"name": drug_name, "dosage": dosage, "frequency": frequency}]}
+    for exposure in dosing_timelines([regimen], EXPOSURE_WINDOW_HOURS, kb.products, kb.dosage_tables.max_daily)[0]:
+        if exposure["is_overdose"]:
+            warning = _overdose_warning(exposure)
+            return {
+                "is_overdose": True,
+                "warning": warning["warning"],
+                "estimated_daily": warning["estimated_daily"],
+                "max_safe": warning["max_safe"]
+            }
+    return {"is_overdose": False, "warning": ""}
+
+
+def analyze_interactions(patient: ProfileLike, kb: Optional[KnowledgeBase] = None) -> List[dict]:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    interactions = []
+    drug_names = [drug.name.lower() for drug in patient.drugs]
+
+    for i, drug1 in enumerate(drug_names):
+        for drug2 in drug_names[i+1:]:
+            interaction = kb.interaction(drug1, drug2)
+            if interaction is not None:
+                interactions.append({
+                    "severity": interaction["severity"],
+                    "description": interaction["description"],
+                    "drugs_involved": [drug1, drug2]
+                })
+
+    return interactions
+
+
+def dosage_recommendations(patient: ProfileLike, kb: Optional[KnowledgeBase] = None,
+                           exposures: Optional[List[dict]] = None) -> List[dict]:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    if exposures is None:
+        exposures = ingredient_exposure(patient, kb)
+    overdoses = _overdoses_by_drug(exposures)
+    tables = kb.dosage_tables
+    recommendations = []
+    age_group = tables.band_name(patient.age)
+    patient_warnings = tables.patient_warnings(patient.age, patient.weight_kg)
+
+    for drug in patient.drugs:
+        drug_name = drug.name.lower()
+        dosage = tables.recommended(drug_name, patient.age)
+        if dosage is not None:
+            warnings = []
+
+            # Check overdose
+            drug_overdoses = overdoses.get(drug_name.strip())
+            if drug_overdoses:
+                warnings.extend(warning["warning"] for warning in drug_overdoses)
+                warnings.append("REDUCE DOSAGE IMMEDIATELY")
+
+            warnings.extend(patient_warnings)
+            warnings.extend(tables.drug_warnings(drug_name, patient.age))
+
+            recommendations.append({
+                "drug_name": drug_name,
+                "recommended_dosage": dosage,
+                "age_group": age_group,
+                "warnings": warnings
+            })
+
+    return recommendations
+
+
+def alternative_medications(patient: ProfileLike, kb: Optional[KnowledgeBase] = None,
+                            exposures: Optional[List[dict]] = None) -> List[dict]:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    if exposures is None:
+        exposures = ingredient_exposure(patient, kb)
+    overdoses = _overdoses_by_drug(exposures)
+    alternatives = []
+
+    for drug in patient.drugs:
+        drug_name = drug.name.lower()
+
+        # Check overdose
+        is_overdose = drug_name.strip() in overdoses
+
+        for alt in kb.drug_alternatives(drug_name):
+            reason = alt["reason"]
+            if is_overdose:
+                reason = f"OVERDOSE DETECTED - {reason}"
+
+            # Get safe dosage
+            safe_dosage = kb.dosage_tables.recommended(alt["name"].lower(), patient.age)
+            if safe_dosage is None:
+                safe_dosage = "Consult physician"
+
+            alternatives.append({
+                "name": alt["name"],
+                "reason": reason,
+                "dosage": safe_dosage
+            })
+
+    return alternatives
+
+
+def screen_contraindications(patient: ProfileLike, kb: Optional[KnowledgeBase] = None) -> List[dict]:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    drug_names = [drug.name.lower() for drug in patient.drugs]
+    return kb.condition_index.screen(patient.medical_conditions or [], drug_names)
+
+
+def dosing_timeline(patient: ProfileLike, window_hours: float = EXPOSURE_WINDOW_HOURS,
+                    kb: Optional[KnowledgeBase] = None) -> dict:
+    """Rolling 24h exposure per active ingredient, summed across all entries and products"""
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    ingredients = dosing_timelines([patient.model_dump()], window_hours, kb.products,
+                                   kb.dosage_tables.max_daily)[0]
+    return {"window_hours": window_hours, "ingredients": ingredients}
+
+
+def overdose_warnings(patient: ProfileLike, kb: Optional[KnowledgeBase] = None,
+                      exposures: Optional[List[dict]] = None) -> List[dict]:
+    if exposures is None:
+        exposures = ingredient_exposure(patient, kb)
+    return [_overdose_warning(exposure) for exposure in exposures if exposure["is_overdose"]]
+
+
+def safe_to_add(patient: ProfileLike, drug_class: Optional[str] = None,
+                kb: Optional[KnowledgeBase] = None) -> dict:
+    """Every formulary drug (or every drug of one class), ranked by what adding it would break"""
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    drug_names = [drug.name.lower().strip() for drug in patient.drugs]
+    ingredients = {row["ingredient"]: row for row in ingredient_exposure(patient, kb)}
+    candidates = screen_candidates(kb, drug_names, ingredients, patient.age,
+                                   patient.medical_conditions or [], drug_class)
+    return {
+        "drug_class": drug_class,
+        "age_group": kb.dosage_tables.band_name(patient.age),
+        "candidates": candidates
+    }
+
+
+def formulary_restrictions(patient: ProfileLike, kb: Optional[KnowledgeBase] = None) -> List[dict]:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    return [{"drug": drug.name, "reason": "Not on the formulary"}
+            for drug in patient.drugs if drug.name.lower().strip() in kb.restricted_drugs]
+
+
+def dispense_gate(request: dict, kb: Optional[KnowledgeBase] = None) -> dict:
+    """Whether a candidate drug can be dispensed: no HIGH interaction and no overdose.
+
+    Takes the raw request dict rather than a profile, skipping model
+    validation; raises ValueError for a malformed request.
+    """
+    kb = kb or get_knowledge_base()
+    return check_dispense(kb, *parse_gate_request(request))
+
+
+def summarize_analysis(interactions: List[dict], contraindications: List[dict], exposures: List[dict]) -> dict:
+    """Aggregates for dashboards, so clients don't have to walk every finding"""
+    severity_counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    for interaction in interactions:
+        severity_counts[interaction["severity"]] = severity_counts.get(interaction["severity"], 0) + 1
+
+    contraindication_counts = {"HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    for finding in contraindications:
+        contraindication_counts[finding["severity"]] = contraindication_counts.get(finding["severity"], 0) + 1
+
+    # Per active ingredient, the same figures the overdose checks compare
+    daily_doses = [{
+        "drug": exposure["ingredient"],
+        "sources": exposure["sources"],
+        "current_daily_mg": exposure["peak_24h_mg"],
+        "max_daily_mg": exposure["max_daily_mg"]
+    } for exposure in exposures]
+
+    return {
+        "interaction_severity_counts": severity_counts,
+        "contraindication_severity_counts": contraindication_counts,
+        "daily_doses": daily_doses
+    }
+
+
+def comprehensive_analysis(patient: ProfileLike, kb: Optional[KnowledgeBase] = None,
+                           exposures: Optional[List[dict]] = None) -> dict:
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    with tracer.span("interactions"):
+        interactions = analyze_interactions(patient, kb)
+    # One exposure timeline feeds every section that reports overdoses
+    with tracer.span("overdose"):
+        if exposures is None:
+            exposures = ingredient_exposure(patient, kb)
+        overdoses = overdose_warnings(patient, kb, exposures)
+    with tracer.span("dosage_rules"):
+        dosages = dosage_recommendations(patient, kb, exposures)
+    with tracer.span("alternatives"):
+        alternatives = alternative_medications(patient, kb, exposures)
+    with tracer.span("contraindications"):
+        contraindications = screen_contraindications(patient, kb)
+    with tracer.span("formulary"):
+        restrictions = formulary_restrictions(patient, kb)
+    with tracer.span("summary"):
+        summary = summarize_analysis(interactions, contraindications, exposures)
+
+    return {
+        "patient_age": patient.age,
+        "analyzed_drugs": len(patient.drugs),
+        "summary": summary,
+        "overdose_warnings": overdoses,
+        "interactions": interactions,
+        "contraindications": contraindications,
+        "formulary_restrictions": restrictions,
+        "dosage_recommendations": dosages,
+        "alternative_medications": alternatives,
+        "analysis_timestamp": datetime.now().isoformat()
+    }
+
+
+def profile_from_text(text: str, age: int, medical_conditions: Optional[List[str]] = None,
+                      weight_kg: Optional[float] = None) -> tuple:
+    """Build the patient profile straight from extracted mentions; returns (profile, mentions).
+
+    The extracted values are already strings of the right shape, so the
+    models are constructed without another validation pass. The mentions
+    keep the parsed dose and interval for `analyze_extracted`.
+    """
+    mentions = select_mentions(scan_drug_mentions(text))
+    drugs = [DrugInput.model_construct(name=m["name"], dosage=m["dosage"], frequency=m["frequency"])
+             for m in mentions]
+    profile = PatientProfile.model_construct(age=age, drugs=drugs, medical_conditions=list(medical_conditions or []),
+                                             weight_kg=weight_kg)
+    return profile, mentions
+
+
+def analyze_extracted(profile: PatientProfile, mentions: List[dict], kb: Optional[KnowledgeBase] = None) -> dict:
+    """Comprehensive analysis of a profile from `profile_from_text`.
+
+    The exposure timeline is built from the mentions' parsed mg amounts and
+    intervals rather than by parsing the profile's dosage strings again.
+    """
+    kb = kb or get_knowledge_base()
+    regimen = {"age": profile.age, "weight_kg": profile.weight_kg, "drugs": mentions}
+    exposures = dosing_timelines([regimen], EXPOSURE_WINDOW_HOURS, kb.products, kb.dosage_tables.max_daily)[0]
+    return comprehensive_analysis(profile, kb, exposures)
+
+
+def analyze_text(text: str, age: int, medical_conditions: Optional[List[str]] = None,
+                 weight_kg: Optional[float] = None, kb: Optional[KnowledgeBase] = None) -> dict:
+    """Extract the drugs in prescription text and run the comprehensive analysis on them in one step"""
+    with tracer.span("extraction"):
+        profile, mentions = profile_from_text(text, age, medical_conditions, weight_kg)
+    return {"extracted_drugs": [mention_to_drug(m) for m in mentions],
+            "analysis": analyze_extracted(profile, mentions, kb)}
+
+
+def profile_fingerprint(patient: ProfileLike, kb: Optional[KnowledgeBase] = None) -> tuple:
+    """Canonical key of everything the comprehensive analysis depends on.
+
+    Drug order, letter case and the exact age within an age group don't
+    change the findings, so profiles differing only in those share a key.
+    The knowledge base identity (version, tenant) is part of the key.
+    """
+    patient = as_profile(patient)
+    kb = kb or get_knowledge_base()
+    drugs = tuple(sorted(
+        (drug.name.lower(), (drug.dosage or "").strip().lower(), (drug.frequency or "").strip().lower())
+        for drug in patient.drugs
+    ))
+    conditions = tuple(sorted({
+        kb.condition_index.canonical(c) or normalize_condition(c) for c in patient.medical_conditions or []
+    }))
+    age_key = (kb.dosage_tables.band_name(patient.age),
+               tuple(kb.dosage_tables.patient_warnings(patient.age, patient.weight_kg)))
+    return kb.identity + age_key + (patient.weight_kg, drugs, conditions)
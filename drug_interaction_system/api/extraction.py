@@ -0,0 +1,182 @@
+import re
+from itertools import count
+from typing import Dict, List, Tuple
+
+from timeline import extract_dosage_amount, parse_frequency
+
+# Enhanced patterns
+EXTRACTION_PATTERNS = [
+    re.compile(r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)\s+(?:every|q)\s+(\d+)\s+hours?', re.IGNORECASE),
+    re.compile(r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)\s+(daily|once daily|bid|tid)\b', re.IGNORECASE),
+    re.compile(r'take\s+(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)', re.IGNORECASE),
+    re.compile(r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)', re.IGNORECASE),
+]
+
+# No pattern can match across these characters (only word characters,
+# whitespace and decimal points appear in a mention), so text between two
+# boundaries can be scanned on its own with the same result as a full scan.
+SEGMENT_BOUNDARY = re.compile(r'[^\w\s.]|\.(?!\d)')
+
+
+def scan_drug_mentions(text: str, base: int = 0) -> List[dict]:
+    """Run every extraction pattern over `text`, returning mentions with spans.
+
+    Spans are offset by `base` so a region of a larger document can be
+    scanned in place. Each mention also carries its dose in mg and the
+    hours between doses, parsed once here for the exposure timeline.
+    Matching is case-insensitive on the original text (lowercasing the
+    text first could change its length and shift the spans); only the
+    captured values are lowercased.
+    """
+    mentions = []
+    for pattern_index, pattern in enumerate(EXTRACTION_PATTERNS):
+        for match in pattern.finditer(text):
+            groups = [group.lower() for group in match.groups()]
+            name, dose, unit = groups[0], groups[1], groups[2]
+            frequency = "as prescribed"
+            if pattern_index == 0:
+                frequency = f"every {groups[3]} hours"
+            elif pattern_index == 1:
+                frequency = groups[3]
+
+            mentions.append({
+                "pattern": pattern_index,
+                "start": base + match.start(),
+                "end": base + match.end(),
+                "name": name,
+                "dosage": f"{dose}{unit}",
+                "frequency": frequency,
+                "amount_mg": extract_dosage_amount(f"{dose}{unit}"),
+                "interval_hours": parse_frequency(frequency)
+            })
+    return mentions
+
+
+def mention_to_drug(mention: dict) -> dict:
+    return {
+        "name": mention["name"],
+        "dosage": mention["dosage"],
+        "frequency": mention["frequency"]
+    }
+
+
+def extract_drugs(text: str) -> List[dict]:
+    """Extract drug mentions from free text, one per stretch of text, in text order."""
+    return [mention_to_drug(m) for m in select_mentions(scan_drug_mentions(text))]
+
+
+def select_mentions(mentions: List[dict]) -> List[dict]:
+    """One mention per stretch of text, in text order.
+
+    The patterns overlap ("aspirin 75mg every 6 hours" also matches the
+    bare name-and-dose pattern); earlier patterns are more specific, so
+    where mentions overlap the one from the earliest pattern is kept.
+    """
+    selected = []
+    for mention in sorted(mentions, key=lambda m: (m["pattern"], m["start"])):
+        if all(mention["end"] <= kept["start"] or mention["start"] >= kept["end"] for kept in selected):
+            selected.append(mention)
+    selected.sort(key=lambda m: m["start"])
+    return selected
+
+
+class ExtractionSession:
+    """Per-connection scan state for incremental extraction.
+
+    Keeps the current text and the mentions found in it, selected as in
+    `extract_drugs`. An edit replaces a character range; only the segments
+    touched by the edit are rescanned and mentions after it are shifted.
+    Mentions never overlap across segments, so selecting within the
+    rescanned segments gives the same result as selecting over the whole
+    text.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.mentions: List[dict] = []
+        self._ids = count(1)
+
+    def _region(self, start: int, end: int) -> Tuple[int, int]:
+        """Widen [start, end) of the current text to segment boundaries."""
+        left = start
+        while left > 0 and not SEGMENT_BOUNDARY.match(self.text, left - 1):
+            left -= 1
+        right_match = SEGMENT_BOUNDARY.search(self.text, end)
+        right = right_match.start() if right_match else len(self.text)
+        return left, right
+
+    def _tag(self, mentions: List[dict]) -> List[dict]:
+        for mention in mentions:
+            mention["id"] = next(self._ids)
+        return mentions
+
+    def reset(self, text: str) -> Dict[str, List[dict]]:
+        removed = self.mentions
+        self.text = text
+        self.mentions = self._tag(select_mentions(scan_drug_mentions(text)))
+        return {"added": list(self.mentions), "removed": removed}
+
+    def apply_edit(self, start: int, end: int, replacement: str) -> Dict[str, List[dict]]:
+        """Replace text[start:end] with `replacement` and rescan the edited region."""
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range {start}-{end} outside text of length {len(self.text)}")
+
+        delta = len(replacement) - (end - start)
+        self.text = self.text[:start] + replacement + self.text[end:]
+        left, right = self._region(start, start + len(replacement))
+        old_right = right - delta
+
+        kept_before, stale, kept_after = [], [], []
+        for mention in self.mentions:
+            if mention["end"] <= left:
+                kept_before.append(mention)
+            elif mention["start"] >= old_right:
+                mention["start"] += delta
+                mention["end"] += delta
+                kept_after.append(mention)
+            else:
+                stale.append(mention)
+
+        fresh = select_mentions(scan_drug_mentions(self.text[left:right], base=left))
+
+        # Mentions that survive the edit unchanged keep their id
+        def signature(m, shift=0):
+            return (m["pattern"], m["start"] + shift, m["end"] + shift,
+                    m["name"], m["dosage"], m["frequency"])
+
+        unmatched = {}
+        for mention in stale:
+            shift = delta if mention["start"] >= end else 0
+            unmatched.setdefault(signature(mention, shift), []).append(mention)
+        added = []
+        region = []
+        for mention in fresh:
+            previous = unmatched.get(signature(mention))
+            if previous:
+                mention["id"] = previous.pop(0)["id"]
+            else:
+                self._tag([mention])
+                added.append(mention)
+            region.append(mention)
+        removed = [m for group in unmatched.values() for m in group]
+
+        self.mentions = kept_before + region + kept_after
+        return {"added": added, "removed": removed}
+
+    def drugs(self) -> List[dict]:
+        return [mention_to_drug(m) for m in self.mentions]
+
+
+def extract_many(texts: List[str]) -> List[List[dict]]:
+    """Extract a chunk of documents; the unit of work handed to pool workers."""
+    return [extract_drugs(text) for text in texts]
+
+
+def chunked(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def default_chunksize(n_items: int, n_workers: int) -> int:
+    # Same heuristic as multiprocessing.Pool.map: about four chunks per worker
+    chunksize, extra = divmod(n_items, n_workers * 4)
+    return max(1, chunksize + bool(extra))
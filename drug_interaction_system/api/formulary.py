@@ -0,0 +1,204 @@
+import weakref
+from typing import Dict, Iterator, List, Optional
+
+from knowledge_base import SEVERITIES, KnowledgeBase
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Set bit positions in ascending order (linear in the mask width, unlike repeated `mask & -mask`)."""
+    bits = bin(mask)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class FormularyIndex:
+    """Bitset index over every drug the knowledge base knows.
+
+    Each drug gets a bit position, including names that only appear as
+    interaction partners (alcohol); `formulary` masks the ones that can be
+    prescribed. For each severity, `partners[severity][i]`
+    has the bits of the drugs interacting with drug i at that severity, and
+    classes, age-band rules, ingredients and contraindications are masks
+    over the same positions. Screening all candidates against a regimen is
+    a few ORs and ANDs per regimen drug, whatever the formulary size.
+    """
+
+    def __init__(self, kb: KnowledgeBase):
+        tables = kb.dosage_tables
+        prescribable = set(tables.drug_index) | set(kb.drug_classes) | set(kb.products)
+        for alternatives in kb.alternatives.values():
+            prescribable.update(alt["name"].lower() for alt in alternatives)
+        names = set(prescribable)
+        for pair in kb.interactions:
+            names.update(pair)
+
+        self.drugs = sorted(names)
+        self.position = {drug: i for i, drug in enumerate(self.drugs)}
+        self.formulary = self.mask(prescribable)
+
+        # Most severe first; a severity outside SEVERITIES is ranked above HIGH
+        # rather than being offered as the safer choice
+        unknown = sorted({info["severity"] for info in kb.interactions.values()} - set(SEVERITIES))
+        self.severities = tuple(unknown) + SEVERITIES
+        self.partners = {severity: [0] * len(self.drugs) for severity in self.severities}
+        for (drug1, drug2), info in kb.interactions.items():
+            row = self.partners[info["severity"]]
+            row[self.position[drug1]] |= self.bit(drug2)
+            row[self.position[drug2]] |= self.bit(drug1)
+
+        self.class_masks: Dict[str, int] = {}
+        for drug, classes in kb.drug_classes.items():
+            for drug_class in classes:
+                self.class_masks[drug_class] = self.class_masks.get(drug_class, 0) | self.bit(drug)
+
+        # Per age band: drugs not recommended at all, and drugs with band-specific warnings
+        self.not_recommended = [0] * len(tables.band_names)
+        self.band_warnings = [0] * len(tables.band_names)
+        for drug, row in tables.drug_index.items():
+            for band in range(len(tables.band_names)):
+                dosage = tables.recommended_table[row][band]
+                if dosage is not None and dosage.lower().startswith("not recommended"):
+                    self.not_recommended[band] |= self.bit(drug)
+                if tables.drug_warnings_table[row][band]:
+                    self.band_warnings[band] |= self.bit(drug)
+
+        # Drugs containing each active ingredient, a plain drug being its own ingredient
+        self.ingredient_masks: Dict[str, int] = {}
+        for drug in self.drugs:
+            for ingredient in kb.products.get(drug, {drug: 0}):
+                self.ingredient_masks[ingredient] = self.ingredient_masks.get(ingredient, 0) | self.bit(drug)
+
+        self.contraindicated: Dict[str, int] = {
+            condition: self.mask(drugs) for condition, drugs in kb.condition_index.index.items()
+        }
+
+    def bit(self, drug: str) -> int:
+        position = self.position.get(drug)
+        return 0 if position is None else 1 << position
+
+    def mask(self, drugs) -> int:
+        mask = 0
+        for drug in drugs:
+            mask |= self.bit(drug)
+        return mask
+
+
+_indexes: "weakref.WeakKeyDictionary[KnowledgeBase, FormularyIndex]" = weakref.WeakKeyDictionary()
+
+
+def formulary_index(kb: KnowledgeBase) -> FormularyIndex:
+    """The index for a knowledge base, built on first use and dropped with it."""
+    index = _indexes.get(kb)
+    if index is None:
+        index = _indexes[kb] = FormularyIndex(kb)
+    return index
+
+
+def cached_formulary_index(kb: KnowledgeBase) -> Optional[FormularyIndex]:
+    """The index for a knowledge base if it has been built, without building it."""
+    return _indexes.get(kb)
+
+
+def screen_candidates(kb: KnowledgeBase, drug_names: List[str], ingredients: Dict[str, dict], age: int,
+                      conditions: List[str], drug_class: Optional[str] = None) -> List[dict]:
+    """Rank every formulary drug (optionally one class) by what adding it to the regimen would break.
+
+    `ingredients` maps the regimen's active ingredients to their dosing
+    timeline rows, used to flag candidates that add to an ingredient
+    already taken.
+    """
+    index = formulary_index(kb)
+    regimen = index.mask(drug_names)
+    candidates = index.formulary & ~regimen & ~index.mask(kb.restricted_drugs)
+    if drug_class is not None:
+        candidates &= index.class_masks.get(drug_class.lower(), 0)
+
+    # Worst severity first, so each candidate is claimed by its worst interaction
+    by_severity: Dict[str, int] = {}
+    remaining = candidates
+    for severity in index.severities:
+        introduced = 0
+        for drug in drug_names:
+            position = index.position.get(drug)
+            if position is not None:
+                introduced |= index.partners[severity][position]
+        by_severity[severity] = introduced & remaining
+        remaining &= ~introduced
+
+    band = kb.dosage_tables.band(age)
+    not_recommended = candidates & index.not_recommended[band]
+    band_warnings = candidates & index.band_warnings[band]
+    overlapping = 0
+    for ingredient in ingredients:
+        overlapping |= index.ingredient_masks.get(ingredient, 0)
+    overlapping &= candidates
+    contraindicated = 0
+    for condition in {kb.condition_index.canonical(c) for c in conditions}:
+        contraindicated |= index.contraindicated.get(condition, 0)
+    contraindicated &= candidates
+    flagged = not_recommended | band_warnings | overlapping | contraindicated
+
+    # Safest first: no interaction, then the least severe worst interaction; within
+    # each group, unflagged drugs by name, then flagged ones by number of flags
+    results = []
+    groups = [(None, remaining)] + [(severity, by_severity[severity]) for severity in reversed(index.severities)]
+    for severity, group in groups:
+        flagged_rows = []
+        for i in iter_bits(group):
+            drug = index.drugs[i]
+            bit = 1 << i
+            interactions = []
+            if severity is not None:
+                for other in drug_names:
+                    interaction = kb.interaction(drug, other)
+                    if interaction is not None:
+                        interactions.append({"with": other, **interaction})
+            flags = []
+            if flagged & bit:
+                flags = _rule_flags(kb, drug, bit, age, ingredients, conditions, not_recommended,
+                                    band_warnings, overlapping, contraindicated)
+            row = {
+                "drug": drug,
+                "classes": kb.drug_classes.get(drug, []),
+                "worst_severity": severity,
+                "interactions": interactions,
+                "flags": flags,
+                "safe": severity is None and not flags
+            }
+            (flagged_rows if flags else results).append(row)
+        results.extend(sorted(flagged_rows, key=lambda r: len(r["flags"])))
+    return results
+
+
+def _rule_flags(kb: KnowledgeBase, drug: str, bit: int, age: int, ingredients: Dict[str, dict],
+                conditions: List[str], not_recommended: int, band_warnings: int, overlapping: int,
+                contraindicated: int) -> List[dict]:
+    flags = []
+    tables = kb.dosage_tables
+    if not_recommended & bit:
+        flags.append({"rule": "age_band", "detail": f"Not recommended for age group {tables.band_name(age)}"})
+    if band_warnings & bit:
+        for warning in tables.drug_warnings(drug, age):
+            flags.append({"rule": "age_band", "detail": warning})
+    if overlapping & bit:
+        for ingredient, mg_per_unit in kb.products.get(drug, {drug: 0}).items():
+            exposure = ingredients.get(ingredient)
+            if exposure is None:
+                continue
+            limit = exposure["max_daily_mg"]
+            headroom = limit - exposure["peak_24h_mg"] if limit else None
+            # Product units have a known strength; a plain drug's dose isn't known yet
+            exceeds = headroom is not None and (headroom <= 0 or mg_per_unit > headroom)
+            flags.append({
+                "rule": "overdose" if exceeds else "duplicate_ingredient",
+                "detail": f"Adds {ingredient} to {exposure['peak_24h_mg']:g}mg/day already taken"
+                          + (f" (limit {limit:g}mg/day)" if limit else ""),
+                "ingredient": ingredient,
+                "headroom_mg": headroom
+            })
+    if contraindicated & bit:
+        for finding in kb.condition_index.screen(conditions, [drug]):
+            flags.append({"rule": "contraindication", "detail": f"{finding['condition']}: {finding['reason']}"})
+    return flags
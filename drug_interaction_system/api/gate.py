@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from knowledge_base import KnowledgeBase
+from timeline import EXPOSURE_WINDOW_HOURS, ingredient_doses, parse_frequency
+
+BLOCKING_SEVERITY = "HIGH"
+
+_EXPOSURE_MIN = EXPOSURE_WINDOW_HOURS * 60
+
+
+@lru_cache(maxsize=1024)
+def doses_per_window(frequency: str) -> int:
+    """Doses taken within one exposure window, counted the way `rolling_exposure` does.
+
+    Every dose starts at time 0 and the timeline window equals the exposure
+    window, so the peak 24h exposure of an ingredient is just the sum of
+    amount x doses over its sources; no event expansion is needed.
+    """
+    interval_min = max(int(round(parse_frequency(frequency) * 60)), 1)
+    return -(-_EXPOSURE_MIN // interval_min)
+
+
+def _drug(value, field: str) -> Tuple[str, str, str]:
+    if not isinstance(value, dict) or not isinstance(value.get("name"), str):
+        raise ValueError(f"{field} must be an object with a string name")
+    dosage = value.get("dosage") or ""
+    frequency = value.get("frequency") or ""
+    if not isinstance(dosage, str) or not isinstance(frequency, str):
+        raise ValueError(f"{field} dosage and frequency must be strings")
+    return value["name"].lower().strip(), dosage, frequency
+
+
+def parse_gate_request(data) -> Tuple[int, Optional[float], List[Tuple[str, str, str]], Tuple[str, str, str]]:
+    """(age, weight_kg, drugs, candidate) from a gate request body; raises ValueError when malformed.
+
+    The body is {"age", "weight_kg"?, "drugs": [...], "candidate": {...}} with
+    drugs as in `PatientProfile`. Only the fields the gate reads are checked.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object")
+    age = data.get("age")
+    if not isinstance(age, int) or isinstance(age, bool):
+        raise ValueError("age must be an integer")
+    weight_kg = data.get("weight_kg")
+    if weight_kg is not None and (not isinstance(weight_kg, (int, float)) or isinstance(weight_kg, bool)):
+        raise ValueError("weight_kg must be a number")
+    drugs = data.get("drugs", [])
+    if not isinstance(drugs, list):
+        raise ValueError("drugs must be a list")
+    return (age, weight_kg, [_drug(drug, f"drugs[{i}]") for i, drug in enumerate(drugs)],
+            _drug(data.get("candidate"), "candidate"))
+
+
+def _parts(name: str, dosage: str, products) -> List[str]:
+    """A drug's name and, for a product, its active ingredients: everything an interaction can be listed under."""
+    parts = [name]
+    for ingredient, _ in ingredient_doses(name, dosage, products):
+        if ingredient != name:
+            parts.append(ingredient)
+    return parts
+
+
+def check_dispense(kb: KnowledgeBase, age: int, weight_kg: Optional[float],
+                   drugs: List[Tuple[str, str, str]], candidate: Tuple[str, str, str]) -> dict:
+    """Whether dispensing `candidate` creates a HIGH interaction or an overdose, stopping at the first.
+
+    Interactions are single lookups, so they are checked first, between the
+    names and ingredients of the candidate and of each current drug (a
+    product containing aspirin interacts like aspirin). Exposure is then
+    summed only for the candidate's own ingredients.
+    """
+    name, dosage, frequency = candidate
+    products = kb.products
+    candidate_parts = _parts(name, dosage, products)
+    for other, other_dosage, _ in drugs:
+        for other_part in _parts(other, other_dosage, products):
+            for part in candidate_parts:
+                interaction = kb.interaction(part, other_part)
+                if interaction is not None and interaction["severity"] == BLOCKING_SEVERITY:
+                    return {"allowed": False, "reason": "interaction", "drug": name, "with": other,
+                            "ingredients": [part, other_part], "severity": interaction["severity"],
+                            "description": interaction["description"]}
+
+    exposure = {}
+    for ingredient, mg in ingredient_doses(name, dosage, products):
+        exposure[ingredient] = exposure.get(ingredient, 0) + mg * doses_per_window(frequency)
+    for other, other_dosage, other_frequency in drugs:
+        for ingredient, mg in ingredient_doses(other, other_dosage, products):
+            if ingredient in exposure:
+                exposure[ingredient] += mg * doses_per_window(other_frequency)
+    for ingredient, daily_mg in exposure.items():
+        limit = kb.dosage_tables.max_daily(ingredient, age, weight_kg)
+        if limit and daily_mg > limit:
+            return {"allowed": False, "reason": "overdose", "drug": name, "ingredient": ingredient,
+                    "daily_mg": daily_mg, "max_daily_mg": limit}
+    return {"allowed": True}
@@ -0,0 +1,294 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+
+# Results are written back in chunks of this many profiles, which is also
+# how much work a cancelled or interrupted job can lose
+JOB_CHUNK_SIZE = 50
+# Job worker processes run at a lower CPU priority than the API process
+JOB_NICENESS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+# Statuses a job can no longer leave
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobStore:
+    """Durable job state in SQLite: one row per job, one row per profile.
+
+    An item's result is stored in the same transaction that advances the
+    job's progress, so after a restart a job picks up at its first item
+    without a result.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def submit(self, profiles: List[dict], priority: int = 0) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, priority, total, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, priority, len(profiles), time.time())
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, seq, profile) VALUES (?, ?, ?)",
+                ((job_id, seq, json.dumps(profile)) for seq, profile in enumerate(profiles))
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def list(self, limit: int = 100) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[str]:
+        """Mark the highest-priority, oldest queued job as running and return its id."""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) WHERE id = ?",
+                (time.time(), row["id"])
+            )
+            return row["id"]
+
+    def pending_items(self, job_id: str, limit: int) -> List[tuple]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, profile FROM job_items WHERE job_id = ? AND result IS NULL ORDER BY seq LIMIT ?",
+                (job_id, limit)
+            ).fetchall()
+        return [(row["seq"], json.loads(row["profile"])) for row in rows]
+
+    def record_results(self, job_id: str, results: List[tuple]):
+        """Store (seq, result) pairs; results with an "error" key count as failed items."""
+        failed = sum(1 for _, result in results if "error" in result)
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE job_items SET result = ? WHERE job_id = ? AND seq = ?",
+                ((json.dumps(result), job_id, seq) for seq, result in results)
+            )
+            self._db.execute(
+                "UPDATE jobs SET completed = completed + ?, failed = failed + ? WHERE id = ?",
+                (len(results), failed, job_id)
+            )
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND status NOT IN (?, ?, ?)",
+                (status, time.time(), error, job_id, *FINISHED_STATUSES)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; a running job stops after its current chunk."""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id)
+            )
+            return cursor.rowcount > 0
+
+    def requeue_running(self) -> int:
+        """Put jobs left running by a previous process back in the queue."""
+        with self._lock, self._db:
+            return self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+
+    def results(self, job_id: str, offset: int = 0, batch_size: int = 500) -> Iterator[dict]:
+        """Completed results in input order, read in batches."""
+        seq = offset
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT seq, result FROM job_items WHERE job_id = ? AND seq >= ? AND result IS NOT NULL "
+                    "ORDER BY seq LIMIT ?",
+                    (job_id, seq, batch_size)
+                ).fetchall()
+            for row in rows:
+                yield {"index": row["seq"], **json.loads(row["result"])}
+            if len(rows) < batch_size:
+                return
+            seq = rows[-1]["seq"] + 1
+
+
+# Set in each job worker process: the last knowledge base received, reused while
+# its identity is unchanged so its derived caches survive from chunk to chunk
+_worker_kb = None
+
+
+def _init_worker():
+    if hasattr(os, "nice"):
+        os.nice(JOB_NICENESS)
+
+
+def analyze_chunk(analyze: Callable, profiles: List[dict], kb: Any = None) -> List[dict]:
+    """Analyze a chunk of profiles, as {"result"} or {"error"} per profile; runs in a job worker.
+
+    With `kb`, each profile is analyzed as `analyze(profile, kb)`.
+    """
+    global _worker_kb
+    if kb is not None:
+        if _worker_kb is not None and _worker_kb.identity == kb.identity:
+            kb = _worker_kb
+        _worker_kb = kb
+    results = []
+    for profile in profiles:
+        try:
+            results.append({"result": analyze(profile, kb) if kb is not None else analyze(profile)})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+class JobRunner:
+    """Runs queued jobs, one per runner thread, on at most `max_concurrent_jobs` at a time.
+
+    Runner threads pick jobs by priority, then age, and own all SQLite
+    state. With `processes`, the analyses themselves run on a pool of the
+    same size of worker processes at a lower CPU priority, so batch
+    screening never holds the API process's GIL; `analyze` must then be
+    picklable (a module-level function). `knowledge_base`, if given, is
+    called before each chunk and its result sent along, so workers follow
+    knowledge base updates.
+    """
+
+    def __init__(self, store: JobStore, analyze: Callable[..., dict], max_concurrent_jobs: int = 1,
+                 chunk_size: int = JOB_CHUNK_SIZE, processes: bool = False,
+                 knowledge_base: Optional[Callable[[], Any]] = None):
+        self.store = store
+        self.analyze = analyze
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.knowledge_base = knowledge_base
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        self.store.requeue_running()
+        self._stopping = False
+        if self.processes:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_concurrent_jobs, initializer=_init_worker)
+            # Start the workers now rather than from a runner thread
+            self._pool.submit(int).result()
+        for i in range(self.max_concurrent_jobs):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the current chunks; unfinished jobs resume on the next start."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def notify(self):
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _work(self):
+        while not self._stopping:
+            job_id = self.store.claim_next()
+            if job_id is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(timeout=1.0)
+                continue
+            try:
+                self._run(job_id)
+            except Exception as e:
+                self.store.finish(job_id, "failed", str(e))
+
+    def _run(self, job_id: str):
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["status"] != "running" or self._stopping:
+                # Cancelled, or shutting down (left running, so the next start requeues it)
+                return
+            items = self.store.pending_items(job_id, self.chunk_size)
+            if not items:
+                self.store.finish(job_id, "completed")
+                return
+            profiles = [profile for _, profile in items]
+            kb = self.knowledge_base() if self.knowledge_base is not None else None
+            if self._pool is not None:
+                outcomes = self._pool.submit(analyze_chunk, self.analyze, profiles, kb).result()
+            else:
+                outcomes = analyze_chunk(self.analyze, profiles, kb)
+            self.store.record_results(job_id, [(seq, outcome) for (seq, _), outcome in zip(items, outcomes)])
+
+    def stats(self) -> dict:
+        return {"workers": self.max_concurrent_jobs, "processes": self.processes,
+                "alive": sum(t.is_alive() for t in self._threads)}
+
+
+def job_status(job: dict) -> dict:
+    """Public view of a job row, with progress as a fraction."""
+    total = job["total"]
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "total": total,
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "progress": job["completed"] / total if total else 1.0,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"]
+    }
@@ -0,0 +1,157 @@
+import base64
+import binascii
+import bisect
+import hashlib
+import json
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from knowledge_base import KnowledgeBase
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _drug_records(kb: KnowledgeBase) -> List[Tuple[str, dict]]:
+    names = set(kb.dosage_tables.drug_index) | set(kb.drug_classes) | set(kb.alternatives) | set(kb.products)
+    for pair in kb.interactions:
+        names.update(pair)
+    return [(name, {
+        "name": name,
+        "classes": kb.drug_classes.get(name, []),
+        "ingredients": kb.products.get(name),
+        "has_dosage_rules": kb.dosage_tables.covers(name),
+        "restricted": name in kb.restricted_drugs,
+        "alternatives": [alt["name"] for alt in kb.drug_alternatives(name)]
+    }) for name in names]
+
+
+def _interaction_records(kb: KnowledgeBase) -> List[Tuple[str, dict]]:
+    return [(f"{drug1}|{drug2}", {"drugs": [drug1, drug2], **info})
+            for (drug1, drug2), info in kb.interactions.items()]
+
+
+def _dosage_rule_records(kb: KnowledgeBase) -> List[Tuple[str, dict]]:
+    tables = kb.dosage_tables
+    records = []
+    for drug, row in tables.drug_index.items():
+        bands = {}
+        for band, band_name in enumerate(tables.band_names):
+            if tables.recommended_table[row][band] is None and not tables.max_daily_table[row][band]:
+                continue
+            bands[band_name] = {
+                "dosage": tables.recommended_table[row][band],
+                "max_daily": tables.max_daily_table[row][band] or None,
+                "max_daily_mg_per_kg": tables.max_daily_per_kg_table[row][band] or None,
+                "warnings": list(tables.drug_warnings_table[row][band])
+            }
+        records.append((drug, {"drug": drug, "age_bands": bands}))
+    return records
+
+
+def _alternative_records(kb: KnowledgeBase) -> List[Tuple[str, dict]]:
+    return [(drug, {"drug": drug, "alternatives": alternatives}) for drug, alternatives in kb.alternatives.items()]
+
+
+# Collection name -> builder of (key, record) pairs; keys are drug names or "drug1|drug2"
+COLLECTIONS = {
+    "drugs": _drug_records,
+    "interactions": _interaction_records,
+    "dosage-rules": _dosage_rule_records,
+    "alternatives": _alternative_records
+}
+
+
+class KnowledgeBaseView:
+    """Sorted, read-only listings of one knowledge base, built once and shared by all requests.
+
+    Records are sorted by key, so a page is a binary search for the cursor
+    key and a slice. Keys never depend on position, so cursors stay valid
+    when the knowledge base changes underneath a client.
+    """
+
+    def __init__(self, kb: KnowledgeBase):
+        self.version = kb.version
+        self.collections: Dict[str, Tuple[List[str], List[dict]]] = {}
+        for name, build in COLLECTIONS.items():
+            records = sorted(build(kb), key=lambda item: item[0])
+            self.collections[name] = ([key for key, _ in records], [record for _, record in records])
+
+        digest = hashlib.sha256()
+        for name in COLLECTIONS:
+            digest.update(name.encode())
+            digest.update(json.dumps(self.collections[name][1], sort_keys=True).encode())
+        # Version for readability; content digest so ETags stay correct across restarts
+        self.etag = f"kb-{self.version}-{digest.hexdigest()[:16]}"
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(keys) for name, (keys, _) in self.collections.items()}
+
+    def _range(self, collection: str, prefix: str) -> Tuple[List[str], List[dict], int, int]:
+        keys, records = self.collections[collection]
+        if not prefix or collection == "interactions":
+            return keys, records, 0, len(keys)
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff")
+        return keys, records, start, end
+
+    def _matches(self, collection: str, key: str, prefix: str) -> bool:
+        # Interaction keys hold two drugs; either may match the prefix
+        return collection != "interactions" or not prefix or any(d.startswith(prefix) for d in key.split("|"))
+
+    def page(self, collection: str, prefix: str = "", after: Optional[str] = None,
+             limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[dict], Optional[str]]:
+        """Up to `limit` records after key `after`, and the key to continue from (None at the end)."""
+        keys, records, start, end = self._range(collection, prefix)
+        if after is not None:
+            start = max(start, bisect.bisect_right(keys, after))
+        items = []
+        last_key = None
+        for i in range(start, end):
+            if not self._matches(collection, keys[i], prefix):
+                continue
+            if len(items) == limit:
+                return items, last_key
+            items.append(records[i])
+            last_key = keys[i]
+        return items, None
+
+    def export(self, collection: str, prefix: str = ""):
+        keys, records, start, end = self._range(collection, prefix)
+        for i in range(start, end):
+            if self._matches(collection, keys[i], prefix):
+                yield records[i]
+
+
+_views: "weakref.WeakKeyDictionary[KnowledgeBase, KnowledgeBaseView]" = weakref.WeakKeyDictionary()
+
+
+def knowledge_base_view(kb: KnowledgeBase) -> KnowledgeBaseView:
+    view = _views.get(kb)
+    if view is None:
+        view = _views[kb] = KnowledgeBaseView(kb)
+    return view
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": key}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """The key a cursor continues after; raises ValueError for a malformed cursor."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(data["after"])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against a quoted ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,121 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from contraindications import ConditionIndex, load_condition_index
+from dosage_rules import DosageTables, load_dosage_rules
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+DOSAGE_RULES_PATH = os.environ.get("DOSAGE_RULES_PATH", os.path.join(DATA_DIR, "dosage_rules.json"))
+CONTRAINDICATIONS_PATH = os.environ.get("CONTRAINDICATIONS_PATH", os.path.join(DATA_DIR, "contraindications.json"))
+PRODUCTS_PATH = os.environ.get("PRODUCTS_PATH", os.path.join(DATA_DIR, "products.json"))
+
+# Interaction severities, most severe first
+SEVERITIES = ("HIGH", "MEDIUM", "LOW")
+
+# Enhanced Drug Database
+DRUG_INTERACTIONS = {
+    ("warfarin", "aspirin"): {"severity": "HIGH", "description": "Increased bleeding risk"},
+    ("paracetamol", "alcohol"): {"severity": "HIGH", "description": "Liver toxicity risk"},
+    ("ibuprofen", "aspirin"): {"severity": "MEDIUM", "description": "Increased GI bleeding risk"},
+    ("metformin", "alcohol"): {"severity": "MEDIUM", "description": "Risk of lactic acidosis"}
+}
+
+DRUG_ALTERNATIVES = {
+    "paracetamol": [{"name": "ibuprofen", "reason": "Anti-inflammatory effect"}],
+    "ibuprofen": [{"name": "paracetamol", "reason": "Lower GI risk"}],
+    "aspirin": [{"name": "paracetamol", "reason": "Safer for pain relief"}]
+}
+
+DRUG_CLASSES = {
+    "aspirin": ["nsaid", "antiplatelet", "salicylate"],
+    "ibuprofen": ["nsaid"],
+    "paracetamol": ["analgesic"],
+    "warfarin": ["anticoagulant"],
+    "metformin": ["biguanide"]
+}
+
+
+def interaction_key(drug1: str, drug2: str) -> Tuple[str, str]:
+    return (drug1, drug2) if drug1 <= drug2 else (drug2, drug1)
+
+
+class KnowledgeBase:
+    """Everything the analyses read: interactions, dosage tables, alternatives,
+    drug classes, the condition index and the active ingredients (mg per
+    unit) of combination and brand-name products.
+
+    Interaction pairs are stored in sorted order so a lookup doesn't depend
+    on which drug was listed first. A knowledge base is never modified in
+    place; changes produce a new one with a higher `version`.
+    """
+
+    def __init__(self, interactions: Dict[Tuple[str, str], dict], dosage_tables: DosageTables,
+                 alternatives: Dict[str, List[dict]], drug_classes: Dict[str, List[str]],
+                 condition_index: ConditionIndex, products: Optional[Dict[str, Dict[str, float]]] = None,
+                 version: int = 1):
+        self.interactions = {interaction_key(*pair): info for pair, info in interactions.items()}
+        self.dosage_tables = dosage_tables
+        self.alternatives = alternatives
+        self.drug_classes = drug_classes
+        self.condition_index = condition_index
+        self.products = {name.lower(): ingredients for name, ingredients in (products or {}).items()}
+        self.version = version
+        # Drugs outside the formulary; only tenant overlays restrict any
+        self.restricted_drugs = frozenset()
+
+    @property
+    def identity(self) -> tuple:
+        """What distinguishes this knowledge base's results from another's, for caches."""
+        return ("base", self.version)
+
+    def interaction(self, drug1: str, drug2: str) -> Optional[dict]:
+        return self.interactions.get(interaction_key(drug1, drug2))
+
+    def drug_alternatives(self, drug_name: str) -> List[dict]:
+        return self.alternatives.get(drug_name, [])
+
+    def with_interaction(self, drug1: str, drug2: str, info: dict) -> "KnowledgeBase":
+        """A copy with one interaction pair added or replaced."""
+        interactions = dict(self.interactions)
+        interactions[interaction_key(drug1.lower(), drug2.lower())] = info
+        return KnowledgeBase(interactions, self.dosage_tables, self.alternatives, self.drug_classes,
+                             self.condition_index, self.products, self.version + 1)
+
+
+def load_products(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_knowledge_base(dosage_rules_path: str = DOSAGE_RULES_PATH,
+                        contraindications_path: str = CONTRAINDICATIONS_PATH,
+                        products_path: str = PRODUCTS_PATH,
+                        interactions: Optional[Dict[Tuple[str, str], dict]] = None,
+                        version: int = 1) -> KnowledgeBase:
+    return KnowledgeBase(
+        interactions=DRUG_INTERACTIONS if interactions is None else interactions,
+        dosage_tables=load_dosage_rules(dosage_rules_path),
+        alternatives=DRUG_ALTERNATIVES,
+        drug_classes=DRUG_CLASSES,
+        condition_index=load_condition_index(contraindications_path, DRUG_CLASSES),
+        products=load_products(products_path),
+        version=version
+    )
+
+
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """The process-wide knowledge base, loaded on first use."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = load_knowledge_base()
+    return _knowledge_base
+
+
+def set_knowledge_base(kb: KnowledgeBase):
+    global _knowledge_base
+    _knowledge_base = kb
@@ -1,258 +1,491 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional, Dict
-import re
+from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
 import json
-from datetime import datetime
-
-app = FastAPI(title="Drug Interaction Analysis API")
-
-# Data Models
-class DrugInput(BaseModel):
-    name: str
-    dosage: Optional[str] = None
-    frequency: Optional[str] = None
-
-class PatientProfile(BaseModel):
-    age: int
-    drugs: List[DrugInput]
-    medical_conditions: Optional[List[str]] = []
-
-class InteractionResult(BaseModel):
-    severity: str
-    description: str
-    drugs_involved: List[str]
-
-class DosageRecommendation(BaseModel):
-    drug_name: str
-    recommended_dosage: str
-    age_group: str
-    warnings: List[str]
-
-class AlternativeDrug(BaseModel):
-    name: str
-    reason: str
-    dosage: str
-
-# Enhanced Drug Database
-DRUG_INTERACTIONS = {
-    ("warfarin", "aspirin"): {"severity": "HIGH", "description": "Increased bleeding risk"},
-    ("paracetamol", "alcohol"): {"severity": "HIGH", "description": "Liver toxicity risk"},
-    ("ibuprofen", "aspirin"): {"severity": "MEDIUM", "description": "Increased GI bleeding risk"},
-    ("metformin", "alcohol"): {"severity": "MEDIUM", "description": "Risk of lactic acidosis"}
-}
-
-AGE_DOSAGE_RULES = {
-    "paracetamol": {
-        "0-12": "10-15mg/kg every 4-6 hours",
-        "13-65": "500-1000mg every 4-6 hours",
-        "65+": "500mg every 6-8 hours",
-        "max_daily": 4000
-    },
-    "ibuprofen": {
-        "0-12": "5-10mg/kg every 6-8 hours",
-        "13-65": "200-400mg every 6-8 hours", 
-        "65+": "200mg every 8 hours",
-        "max_daily": 1200
-    },
-    "aspirin": {
-        "0-12": "Not recommended",
-        "13-65": "75-325mg daily",
-        "65+": "75mg daily",
-        "max_daily": 325
-    }
-}
-
-DRUG_ALTERNATIVES = {
-    "paracetamol": [{"name": "ibuprofen", "reason": "Anti-inflammatory effect"}],
-    "ibuprofen": [{"name": "paracetamol", "reason": "Lower GI risk"}],
-    "aspirin": [{"name": "paracetamol", "reason": "Safer for pain relief"}]
-}
-
-def get_age_group(age: int) -> str:
-    if age <= 12: return "0-12"
-    elif age <= 65: return "13-65"
-    else: return "65+"
-
-def extract_dosage_amount(dosage_str: str) -> float:
-    if not dosage_str:
-        return 0
-    match = re.search(r'(\d+(?:\.\d+)?)', dosage_str)
-    return float(match.group(1)) if match else 0
-
-def check_overdosage(drug_name: str, dosage: str, frequency: str) -> dict:
-    drug_name = drug_name.lower()
-    if drug_name not in AGE_DOSAGE_RULES:
-        return {"is_overdose": False, "warning": ""}
-    
-    dosage_amount = extract_dosage_amount(dosage)
-    max_daily = AGE_DOSAGE_RULES[drug_name].get("max_daily", 0)
-    
-    if not dosage_amount or not max_daily:
-        return {"is_overdose": False, "warning": ""}
-    
-    daily_doses = 1
-    if frequency and "every" in frequency.lower():
-        freq_match = re.search(r'every\s*(\d+)\s*hours?', frequency.lower())
-        if freq_match:
-            hours = int(freq_match.group(1))
-            daily_doses = 24 // hours
-    
-    estimated_daily = dosage_amount * daily_doses
-    
-    if estimated_daily > max_daily:
-        return {
-            "is_overdose": True,
-            "warning": f"OVERDOSE: {estimated_daily}mg/day exceeds {max_daily}mg/day",
-            "estimated_daily": estimated_daily,
-            "max_safe": max_daily
-        }
-    
-    return {"is_overdose": False, "warning": ""}
+import os
+
+import msgpack
+
+import engine
+from coalescing import SingleFlight
+from extraction import ExtractionSession, chunked, default_chunksize, extract_many, mention_to_drug
+from formulary import formulary_index
+from jobs import JobRunner, JobStore, job_status
+from kb_browse import COLLECTIONS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, etag_matches, knowledge_base_view
+from knowledge_base import DATA_DIR, KnowledgeBase, get_knowledge_base, load_knowledge_base, set_knowledge_base
+from memprofile import memory_report
+from models import ExtractionBatch, InteractionUpdate, JobSubmission, PatientProfile, ShadowConfig, TextAnalysisRequest
+from negotiation import NegotiatedResponse, NegotiatedRoute, encode_stream_item, response_is_msgpack, stream_media_type
+from rescreen import RegimenRegistry
+from shadow import ShadowEvaluator
+from tenants import TENANT_HEADER, load_tenants
+from timeline import EXPOSURE_WINDOW_HOURS, MAX_WINDOW_HOURS
+from tracing import TracingMiddleware, tracer
+
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", os.cpu_count() or 1))
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(DATA_DIR, "jobs.db"))
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "1"))
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", "1"))
+SHADOW_MAX_PENDING = int(os.environ.get("SHADOW_MAX_PENDING", "64"))
+
+_extraction_pool = None
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS)
+    return _extraction_pool
+
+job_store = None
+job_runner = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_store, job_runner
+    job_store = JobStore(JOBS_DB_PATH)
+    job_runner = JobRunner(job_store, engine.comprehensive_analysis, MAX_CONCURRENT_JOBS, processes=True,
+                           knowledge_base=get_knowledge_base)
+    # Jobs interrupted by the last shutdown are requeued and continue where they stopped
+    job_runner.start()
+    yield
+    job_runner.stop()
+    job_store.close()
+    if shadow is not None:
+        shadow.stop()
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(cancel_futures=True)
+    if tracer.exporter is not None:
+        tracer.exporter.shutdown()
+
+app = FastAPI(
+    title="Drug Interaction Analysis API",
+    lifespan=lifespan,
+    default_response_class=NegotiatedResponse
+)
+# JSON or MessagePack, chosen by the Content-Type and Accept headers
+app.router.route_class = NegotiatedRoute
+
+# Sampled per-stage spans, exported as JSON lines to TRACE_EXPORT_PATH
+tracer.configure_from_env("api")
+app.add_middleware(TracingMiddleware)
+
+# Per-hospital overlays over the shared knowledge base, selected with the X-Tenant-ID header
+tenant_registry = load_tenants()
+
+# Candidate knowledge base evaluated on a sample of live requests, see /admin/shadow
+shadow: Optional[ShadowEvaluator] = None
+
+def mirror(endpoint: str, patient: PatientProfile, kb: KnowledgeBase):
+    """Offer a request to the shadow evaluator, if one is running; never waits."""
+    if shadow is not None:
+        shadow.offer(endpoint, patient, kb)
+
+def request_knowledge_base(x_tenant_id: Optional[str] = Header(None, alias=TENANT_HEADER)) -> KnowledgeBase:
+    """The knowledge base for this request: the tenant's overlay, or the base without a tenant header."""
+    base = get_knowledge_base()
+    if x_tenant_id is None:
+        return base
+    try:
+        return tenant_registry.knowledge_base(x_tenant_id, base)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant {x_tenant_id}")
 
 @app.get("/")
 async def root():
     return {"message": "Drug Interaction Analysis API"}
 
 @app.post("/analyze-interactions")
-async def analyze_interactions(patient: PatientProfile):
-    interactions = []
-    drug_names = [drug.name.lower() for drug in patient.drugs]
-    
-    for i, drug1 in enumerate(drug_names):
-        for drug2 in drug_names[i+1:]:
-            key = tuple(sorted([drug1, drug2]))
-            if key in DRUG_INTERACTIONS:
-                interaction = DRUG_INTERACTIONS[key]
-                interactions.append({
-                    "severity": interaction["severity"],
-                    "description": interaction["description"],
-                    "drugs_involved": [drug1, drug2]
-                })
-    
-    return interactions
+async def analyze_interactions(patient: PatientProfile, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("analyze-interactions", patient, kb)
+    return engine.analyze_interactions(patient, kb)
 
 @app.post("/dosage-recommendations")
-async def get_dosage_recommendations(patient: PatientProfile):
-    recommendations = []
-    age_group = get_age_group(patient.age)
-    
-    for drug in patient.drugs:
-        drug_name = drug.name.lower()
-        if drug_name in AGE_DOSAGE_RULES:
-            dosage = AGE_DOSAGE_RULES[drug_name][age_group]
-            warnings = []
-            
-            # Check overdose
-            overdose_check = check_overdosage(drug_name, drug.dosage or "", drug.frequency or "")
-            if overdose_check["is_overdose"]:
-                warnings.append(overdose_check["warning"])
-                warnings.append("REDUCE DOSAGE IMMEDIATELY")
-            
-            if patient.age >= 65:
-                warnings.append("Elderly patient - monitor for side effects")
-            if patient.age <= 12:
-                warnings.append("Pediatric dosing required")
-                
-            recommendations.append({
-                "drug_name": drug_name,
-                "recommended_dosage": dosage,
-                "age_group": age_group,
-                "warnings": warnings
-            })
-    
-    return recommendations
+async def get_dosage_recommendations(patient: PatientProfile, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("dosage-recommendations", patient, kb)
+    return engine.dosage_recommendations(patient, kb)
 
 @app.post("/alternative-medications")
-async def get_alternatives(patient: PatientProfile):
-    alternatives = []
-    age_group = get_age_group(patient.age)
-    
-    for drug in patient.drugs:
-        drug_name = drug.name.lower()
-        
-        # Check overdose
-        overdose_check = check_overdosage(drug_name, drug.dosage or "", drug.frequency or "")
-        
-        if drug_name in DRUG_ALTERNATIVES:
-            for alt in DRUG_ALTERNATIVES[drug_name]:
-                reason = alt["reason"]
-                if overdose_check["is_overdose"]:
-                    reason = f"OVERDOSE DETECTED - {reason}"
-                
-                # Get safe dosage
-                alt_name = alt["name"].lower()
-                if alt_name in AGE_DOSAGE_RULES:
-                    safe_dosage = AGE_DOSAGE_RULES[alt_name][age_group]
-                else:
-                    safe_dosage = "Consult physician"
-                
-                alternatives.append({
-                    "name": alt["name"],
-                    "reason": reason,
-                    "dosage": safe_dosage
-                })
-    
-    return alternatives
+async def get_alternatives(patient: PatientProfile, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("alternative-medications", patient, kb)
+    return engine.alternative_medications(patient, kb)
+
+@app.post("/contraindications")
+async def screen_contraindications(patient: PatientProfile, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("contraindications", patient, kb)
+    return engine.screen_contraindications(patient, kb)
+
+@app.post("/dosing-timeline")
+async def dosing_timeline(patient: PatientProfile,
+                          window_hours: float = Query(EXPOSURE_WINDOW_HOURS, ge=EXPOSURE_WINDOW_HOURS, le=MAX_WINDOW_HOURS),
+                          kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("dosing-timeline", patient, kb)
+    return engine.dosing_timeline(patient, window_hours, kb)
+
+@app.post("/safe-to-add")
+async def safe_to_add(patient: PatientProfile, drug_class: Optional[str] = None,
+                      kb: KnowledgeBase = Depends(request_knowledge_base)):
+    """Which drugs (optionally of one class) can be added to the regimen, safest first."""
+    if drug_class is not None and drug_class.lower() not in formulary_index(kb).class_masks:
+        raise HTTPException(status_code=404, detail=f"Unknown drug class {drug_class}")
+    mirror("safe-to-add", patient, kb)
+    return engine.safe_to_add(patient, drug_class, kb)
+
+@app.post("/dispense-gate")
+async def dispense_gate(request: Request, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    """Dispense-time check: does adding the candidate create a HIGH interaction or an overdose?
+
+    Deliberately bypasses the Pydantic models; the body is decoded and
+    checked by hand so the answer stays well under a millisecond.
+    """
+    body = await request.body()
+    try:
+        data = msgpack.unpackb(body) if getattr(request, "body_is_msgpack", False) else json.loads(body)
+        return engine.dispense_gate(data, kb)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @app.post("/extract-drugs")
 async def extract_drugs_from_text(text: Dict[str, str]):
-    medical_text = text.get("text", "")
-    drugs = []
-    
-    # Enhanced patterns
-    patterns = [
-        r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)\s+(?:every|q)\s+(\d+)\s+hours?',
-        r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)\s+(?:daily|once daily|bid|tid)',
-        r'take\s+(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)',
-        r'(\w+)\s+(\d+(?:\.\d+)?)\s*(mg|g)'
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, medical_text.lower())
-        for match in matches:
-            if len(match) >= 3:
-                name, dose, unit = match[0], match[1], match[2]
-                frequency = "as prescribed"
-                if len(match) > 3:
-                    frequency = f"every {match[3]} hours"
-                
-                drugs.append({
-                    "name": name,
-                    "dosage": f"{dose}{unit}",
-                    "frequency": frequency
-                })
-    
-    return drugs
+    with tracer.span("extraction"):
+        return engine.extract_drugs(text.get("text", ""))
 
-@app.post("/comprehensive-analysis")
-async def comprehensive_analysis(patient: PatientProfile):
-    interactions = await analyze_interactions(patient)
-    dosages = await get_dosage_recommendations(patient)
-    alternatives = await get_alternatives(patient)
-    
-    # Check overdoses
-    overdose_warnings = []
-    for drug in patient.drugs:
-        overdose_check = check_overdosage(drug.name.lower(), drug.dosage or "", drug.frequency or "")
-        if overdose_check["is_overdose"]:
-            overdose_warnings.append({
-                "drug": drug.name,
-                "warning": overdose_check["warning"],
-                "estimated_daily": overdose_check.get("estimated_daily", 0),
-                "max_safe": overdose_check.get("max_safe", 0)
+@app.post("/extract-drugs/batch")
+async def extract_drugs_batch(batch: ExtractionBatch):
+    """Extract many documents on the process pool, streamed back in input order.
+
+    Results are NDJSON lines, or a sequence of MessagePack objects when the
+    client accepts MessagePack.
+    """
+    if batch.chunksize is not None and batch.chunksize < 1:
+        raise HTTPException(status_code=422, detail="chunksize must be at least 1")
+
+    documents = batch.documents
+    chunksize = batch.chunksize or default_chunksize(len(documents), EXTRACTION_WORKERS)
+    chunks = chunked(documents, chunksize)
+    pool = get_extraction_pool()
+    # Keep a few chunks per worker in flight so huge jobs don't queue everything at once
+    window = EXTRACTION_WORKERS * 2
+
+    as_msgpack = response_is_msgpack()
+
+    async def results():
+        pending = []
+        submitted = 0
+        for chunk in chunks:
+            while submitted < len(chunks) and len(pending) < window:
+                texts = [doc.text for doc in chunks[submitted]]
+                pending.append(asyncio.wrap_future(pool.submit(extract_many, texts)))
+                submitted += 1
+            extracted = await pending.pop(0)
+            for doc, drugs in zip(chunk, extracted):
+                yield encode_stream_item({"id": doc.id, "drugs": drugs}, as_msgpack)
+
+    return StreamingResponse(results(), media_type=stream_media_type())
+
+@app.websocket("/ws/extract-drugs")
+async def extract_drugs_live(websocket: WebSocket):
+    """Incremental extraction channel.
+
+    Clients send {"type": "reset", "text": ...} or
+    {"type": "edit", "start": ..., "end": ..., "text": ...} messages and get
+    back the drug mentions added and removed by each change.
+    """
+    await websocket.accept()
+    session = ExtractionSession()
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Message must be a JSON object")
+                if message.get("type") == "edit":
+                    delta = session.apply_edit(
+                        int(message["start"]), int(message["end"]), message.get("text", "")
+                    )
+                else:
+                    delta = session.reset(message.get("text", ""))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            await websocket.send_json({
+                "type": "delta",
+                "added": delta["added"],
+                "removed": [m["id"] for m in delta["removed"]],
+                "length": len(session.text)
             })
-    
+    except WebSocketDisconnect:
+        pass
+
+# Identical analyses submitted at the same moment share one computation
+analysis_flight = SingleFlight()
+
+@app.post("/comprehensive-analysis")
+async def comprehensive_analysis(patient: PatientProfile, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    mirror("comprehensive-analysis", patient, kb)
+    return await coalesced_analysis(patient, kb)
+
+async def coalesced_analysis(patient: PatientProfile, kb: KnowledgeBase, mentions: Optional[List[dict]] = None) -> dict:
+    """Comprehensive analysis shared by identical concurrent requests; pass `mentions` for an extracted profile."""
+    with tracer.span("normalize"):
+        fingerprint = engine.profile_fingerprint(patient, kb)
+
+    async def run():
+        # Off the event loop, so identical requests arriving meanwhile find it in flight
+        if mentions is not None:
+            return await asyncio.to_thread(engine.analyze_extracted, patient, mentions, kb)
+        return await asyncio.to_thread(engine.comprehensive_analysis, patient, kb)
+
+    result = await analysis_flight.do(fingerprint, run)
+    # Coalesced callers may differ in exact age within the group
+    return {**result, "patient_age": patient.age}
+
+@app.post("/analyze-text")
+async def analyze_text(request: TextAnalysisRequest, kb: KnowledgeBase = Depends(request_knowledge_base)):
+    """Extract drugs from prescription text and return them with their comprehensive analysis."""
+    with tracer.span("extraction"):
+        patient, mentions = engine.profile_from_text(request.text, request.age, request.medical_conditions,
+                                                     request.weight_kg)
+    mirror("analyze-text", patient, kb)
+    return {"extracted_drugs": [mention_to_drug(m) for m in mentions],
+            "analysis": await coalesced_analysis(patient, kb, mentions)}
+
+def submit_job(profiles: list, priority: int) -> dict:
+    job_id = job_store.submit(profiles, priority)
+    job_runner.notify()
+    return job_status(job_store.get(job_id))
+
+def get_job(job_id: str) -> dict:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@app.post("/jobs", status_code=202)
+async def create_job(submission: JobSubmission):
+    """Queue a comprehensive analysis of every profile; poll GET /jobs/{job_id} for progress."""
+    return submit_job([profile.model_dump() for profile in submission.profiles], submission.priority)
+
+@app.post("/jobs/upload", status_code=202)
+async def create_job_from_file(file: UploadFile = File(...), priority: int = Form(0)):
+    """Queue a job from a data file: JSON lines of profiles, or a JSON array of them."""
+    content = (await file.read()).decode("utf-8")
+    try:
+        if content.lstrip().startswith("["):
+            records = json.loads(content)
+        else:
+            records = [json.loads(line) for line in content.splitlines() if line.strip()]
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid data file: {e}")
+
+    profiles = []
+    for index, record in enumerate(records):
+        try:
+            profiles.append(PatientProfile.model_validate(record).model_dump())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Profile {index}: {e}")
+    return submit_job(profiles, priority)
+
+@app.get("/jobs")
+async def list_jobs(limit: int = Query(100, ge=1, le=1000)):
+    return [job_status(job) for job in job_store.list(limit)]
+
+@app.get("/jobs/{job_id}")
+async def job_progress(job_id: str):
+    return job_status(get_job(job_id))
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, offset: int = Query(0, ge=0)):
+    """Results completed so far, in input order, as NDJSON (or MessagePack) records.
+
+    Each record has the profile's "index" and either "result" or "error";
+    pass `offset` to continue after the records already downloaded.
+    """
+    get_job(job_id)
+    as_msgpack = response_is_msgpack()
+    records = (encode_stream_item(record, as_msgpack) for record in job_store.results(job_id, offset))
+    return StreamingResponse(records, media_type=stream_media_type())
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    get_job(job_id)
+    job_store.cancel(job_id)
+    return job_status(get_job(job_id))
+
+regimen_registry = RegimenRegistry()
+
+def update_knowledge_base(new_kb) -> dict:
+    """Swap in a new knowledge base and re-screen the registered regimens it affects."""
+    old_kb = get_knowledge_base()
+    set_knowledge_base(new_kb)
+    with tracer.span("rescreen"):
+        return regimen_registry.rescreen(old_kb, new_kb)
+
+@app.put("/regimens/{regimen_id}")
+async def register_regimen(regimen_id: str, patient: PatientProfile):
+    """Register an active regimen to be re-screened whenever the knowledge base changes."""
+    findings = regimen_registry.register(regimen_id, patient, get_knowledge_base())
+    return {"regimen_id": regimen_id, "findings": findings}
+
+@app.get("/regimens/{regimen_id}")
+async def get_regimen(regimen_id: str):
+    if regimen_id not in regimen_registry.regimens:
+        raise HTTPException(status_code=404, detail=f"Unknown regimen {regimen_id}")
     return {
-        "patient_age": patient.age,
-        "analyzed_drugs": len(patient.drugs),
-        "overdose_warnings": overdose_warnings,
-        "interactions": interactions,
-        "dosage_recommendations": dosages,
-        "alternative_medications": alternatives,
-        "analysis_timestamp": datetime.now().isoformat()
+        "regimen_id": regimen_id,
+        "patient": regimen_registry.regimens[regimen_id].model_dump(),
+        "findings": list(regimen_registry.findings[regimen_id].values())
     }
 
+@app.delete("/regimens/{regimen_id}")
+async def remove_regimen(regimen_id: str):
+    if not regimen_registry.remove(regimen_id):
+        raise HTTPException(status_code=404, detail=f"Unknown regimen {regimen_id}")
+    return {"regimen_id": regimen_id, "removed": True}
+
+@app.get("/alerts")
+async def get_alerts(since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=10000)):
+    """Findings newly raised by knowledge base changes, after sequence number `since`."""
+    return regimen_registry.alerts.since(since, limit)
+
+@app.post("/admin/kb/interactions")
+async def add_interaction(update: InteractionUpdate):
+    if len(update.drugs) != 2:
+        raise HTTPException(status_code=422, detail="An interaction needs exactly two drugs")
+    kb = get_knowledge_base()
+    info = {"severity": update.severity, "description": update.description}
+    return update_knowledge_base(kb.with_interaction(*update.drugs, info))
+
+@app.post("/admin/kb/reload")
+async def reload_knowledge_base():
+    """Reload the data files (dosage rules, contraindications, products), keeping runtime interaction changes."""
+    kb = get_knowledge_base()
+    try:
+        new_kb = load_knowledge_base(interactions=kb.interactions, version=kb.version + 1)
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Knowledge base not reloaded: {e}")
+    return update_knowledge_base(new_kb)
+
+@app.post("/admin/shadow")
+async def start_shadow(config: ShadowConfig):
+    """Start mirroring a sample of analysis requests to a candidate knowledge base, replacing any running shadow."""
+    global shadow
+    if not 0 < config.sample_rate <= 1:
+        raise HTTPException(status_code=422, detail="sample_rate must be in (0, 1]")
+    kb = get_knowledge_base()
+    candidate = kb
+    if config.reload_files:
+        try:
+            candidate = load_knowledge_base(interactions=kb.interactions, version=kb.version + 1)
+        except (OSError, ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Candidate knowledge base not loaded: {e}")
+    for update in config.interactions:
+        if len(update.drugs) != 2:
+            raise HTTPException(status_code=422, detail="An interaction needs exactly two drugs")
+        candidate = candidate.with_interaction(*update.drugs,
+                                               {"severity": update.severity, "description": update.description})
+    if candidate is kb:
+        raise HTTPException(status_code=422, detail="The candidate is identical to the current knowledge base")
+    if shadow is not None:
+        shadow.stop()
+    shadow = ShadowEvaluator(kb, candidate, config.sample_rate, tenant_registry.specs, SHADOW_WORKERS,
+                             SHADOW_MAX_PENDING)
+    return shadow.report()
+
+@app.get("/admin/shadow")
+async def shadow_report():
+    """Differences between the live and candidate knowledge bases on the requests mirrored so far."""
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="No shadow evaluation running")
+    return shadow.report()
+
+@app.delete("/admin/shadow")
+async def stop_shadow():
+    """Stop the shadow evaluation and return its final report."""
+    global shadow
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="No shadow evaluation running")
+    shadow.stop()
+    report = shadow.report()
+    shadow = None
+    return report
+
+# Tenants see different knowledge bases under the same URLs
+KB_VARY = f"Accept, {TENANT_HEADER}"
+
+def kb_view_or_304(kb: KnowledgeBase, collection: Optional[str], if_none_match: Optional[str]):
+    """The KB view and its ETag, or a 304 response when the client's copy is current."""
+    if collection is not None and collection not in COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown collection {collection}, expected one of {list(COLLECTIONS)}")
+    view = knowledge_base_view(kb)
+    # JSON and MessagePack bodies differ, so each gets its own tag
+    etag = f'"{view.etag}-{"msgpack" if response_is_msgpack() else "json"}"'
+    if etag_matches(if_none_match, etag):
+        return view, etag, Response(status_code=304, headers={"ETag": etag, "Vary": KB_VARY})
+    return view, etag, None
+
+@app.get("/kb")
+async def kb_summary(response: Response, if_none_match: Optional[str] = Header(None),
+                     kb: KnowledgeBase = Depends(request_knowledge_base)):
+    view, etag, not_modified = kb_view_or_304(kb, None, if_none_match)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    # Accept is added to Vary by the negotiated response
+    response.headers["Vary"] = TENANT_HEADER
+    return {"version": view.version, "etag": view.etag, "collections": view.counts()}
+
+@app.get("/kb/{collection}")
+async def kb_page(collection: str, response: Response, prefix: str = "", cursor: Optional[str] = None,
+                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                  if_none_match: Optional[str] = Header(None), kb: KnowledgeBase = Depends(request_knowledge_base)):
+    """One page of a KB collection (drugs, interactions, dosage-rules, alternatives), sorted by drug name.
+
+    `prefix` filters on drug names; pass `next_cursor` back as `cursor` for the next page.
+    """
+    view, etag, not_modified = kb_view_or_304(kb, collection, if_none_match)
+    if not_modified:
+        return not_modified
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items, last_key = view.page(collection, prefix.lower(), after, limit)
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = TENANT_HEADER
+    return {
+        "version": view.version,
+        "collection": collection,
+        "items": items,
+        "next_cursor": encode_cursor(last_key) if last_key is not None else None
+    }
+
+@app.get("/kb/{collection}/export")
+async def kb_export(collection: str, prefix: str = "", if_none_match: Optional[str] = Header(None),
+                    kb: KnowledgeBase = Depends(request_knowledge_base)):
+    """Every record of a collection as NDJSON (or MessagePack) records."""
+    view, etag, not_modified = kb_view_or_304(kb, collection, if_none_match)
+    if not_modified:
+        return not_modified
+    as_msgpack = response_is_msgpack()
+    records = (encode_stream_item(record, as_msgpack) for record in view.export(collection, prefix.lower()))
+    return StreamingResponse(records, media_type=stream_media_type(), headers={"ETag": etag, "Vary": KB_VARY})
+
+@app.get("/admin/memory")
+async def memory_stats(allocations: bool = False, repeat: int = Query(5, ge=1, le=100)):
+    """Resident memory and knowledge base size by table; `allocations=true` also
+    measures per-call allocations of the hot paths against their budgets (slow)."""
+    return memory_report(allocations, repeat, tenants=tenant_registry.loaded())
+
+@app.get("/admin/coalescing")
+async def coalescing_stats():
+    return analysis_flight.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
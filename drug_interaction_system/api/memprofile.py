@@ -0,0 +1,188 @@
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import engine
+from formulary import cached_formulary_index
+from knowledge_base import KnowledgeBase, get_knowledge_base
+
+SAMPLE_PROFILE = {
+    "age": 72,
+    "weight_kg": 48,
+    "drugs": [
+        {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+        {"name": "aspirin", "dosage": "75mg", "frequency": "daily"},
+        {"name": "co-codamol", "dosage": "2 tablets", "frequency": "every 6 hours"},
+        {"name": "paracetamol", "dosage": "500mg", "frequency": "every 8 hours"},
+        {"name": "ibuprofen", "dosage": "400mg", "frequency": "every 8 hours"}
+    ],
+    "medical_conditions": ["chronic kidney disease", "asthma"]
+}
+
+SAMPLE_TEXT = (
+    "Patient takes aspirin 75mg daily and warfarin 5mg once daily. "
+    "Started paracetamol 1000mg every 6 hours for pain; ibuprofen 400mg three times a day as needed. "
+    "Also prescribed metformin 500mg twice daily."
+)
+
+# Per-call allocation budgets for the hot paths, checked by `memory_report.py --check`.
+# peak_bytes: most memory allocated at once during a call;
+# retained_bytes: memory still held after a call (caches excluded by a warm-up call).
+ALLOCATION_BUDGETS = {
+    "comprehensive_analysis": {"peak_bytes": 40 * 1024, "retained_bytes": 1024},
+    "extract_drugs_from_text": {"peak_bytes": 12 * 1024, "retained_bytes": 1024}
+}
+
+
+def hot_paths(kb: Optional[KnowledgeBase] = None) -> Dict[str, Callable[[], object]]:
+    kb = kb or get_knowledge_base()
+    profile = engine.as_profile(SAMPLE_PROFILE)
+    return {
+        "comprehensive_analysis": lambda: engine.comprehensive_analysis(profile, kb),
+        "extract_drugs_from_text": lambda: engine.extract_drugs(SAMPLE_TEXT)
+    }
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Bytes held by an object and everything reachable from it that isn't already counted."""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total
+
+
+def knowledge_base_sizes(kb: Optional[KnowledgeBase] = None) -> Dict[str, int]:
+    """Resident bytes of each knowledge base table, plus derived indexes built from it."""
+    kb = kb or get_knowledge_base()
+    # Strings shared between tables are counted once, for the first table listing them
+    seen: set = set()
+    sizes = {
+        "interactions": deep_sizeof(kb.interactions, seen),
+        "dosage_tables": deep_sizeof(kb.dosage_tables, seen),
+        "alternatives": deep_sizeof(kb.alternatives, seen),
+        "drug_classes": deep_sizeof(kb.drug_classes, seen),
+        "condition_index": deep_sizeof(kb.condition_index, seen),
+        "products": deep_sizeof(kb.products, seen)
+    }
+    index = cached_formulary_index(kb)
+    if index is not None:
+        sizes["formulary_index"] = deep_sizeof(index, seen)
+    sizes["total"] = sum(sizes.values())
+    return sizes
+
+
+def overlay_sizes(overlays: Dict[str, KnowledgeBase]) -> Dict[str, int]:
+    """Bytes each tenant overlay adds on top of the base knowledge base it shares."""
+    sizes = {}
+    for tenant_id, overlay in overlays.items():
+        seen: set = set()
+        deep_sizeof(overlay.base, seen)
+        sizes[tenant_id] = deep_sizeof(vars(overlay), seen)
+    return sizes
+
+
+def resident_memory() -> Optional[int]:
+    """Current resident set size of the process in bytes, where the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current, in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def measure_allocations(fn: Callable[[], object], repeat: int = 5, top: int = 10) -> dict:
+    """Diff tracemalloc snapshots around `repeat` calls of `fn`, after one warm-up call.
+
+    Returns the largest per-call peak, the bytes still held per call
+    afterwards, and the source lines that allocated the most.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        fn()
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        peak = 0
+        for _ in range(repeat):
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            result = fn()
+            del result
+            _, call_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, call_peak - baseline)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    retained = sum(stat.size_diff for stat in diff)
+    return {
+        "calls": repeat,
+        "peak_bytes": peak,
+        "retained_bytes": max(retained, 0) // repeat,
+        "top": [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in diff[:top]
+        ]
+    }
+
+
+def check_budgets(measurements: Dict[str, dict], budgets: Dict[str, dict] = ALLOCATION_BUDGETS) -> List[str]:
+    """Budget violations, as messages; empty when every hot path is within budget."""
+    violations = []
+    for path, budget in budgets.items():
+        measured = measurements.get(path)
+        if measured is None:
+            violations.append(f"{path}: not measured")
+            continue
+        for metric, limit in budget.items():
+            if measured[metric] > limit:
+                violations.append(f"{path}: {metric} {measured[metric]} exceeds budget {limit}")
+    return violations
+
+
+def memory_report(allocations: bool = True, repeat: int = 5, kb: Optional[KnowledgeBase] = None,
+                  tenants: Optional[Dict[str, KnowledgeBase]] = None) -> dict:
+    kb = kb or get_knowledge_base()
+    report = {
+        "resident_bytes": resident_memory(),
+        "knowledge_base": knowledge_base_sizes(kb)
+    }
+    if tenants:
+        report["tenant_overlays"] = overlay_sizes(tenants)
+    if allocations:
+        measurements = {name: measure_allocations(fn, repeat) for name, fn in hot_paths(kb).items()}
+        report["hot_paths"] = measurements
+        report["budget_violations"] = check_budgets(measurements)
+    return report
@@ -0,0 +1,63 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+# Data Models
+Severity = Literal["HIGH", "MEDIUM", "LOW"]
+
+class DrugInput(BaseModel):
+    name: str
+    dosage: Optional[str] = None
+    frequency: Optional[str] = None
+
+class PatientProfile(BaseModel):
+    age: int
+    drugs: List[DrugInput]
+    medical_conditions: Optional[List[str]] = []
+    weight_kg: Optional[float] = None
+
+class TextAnalysisRequest(BaseModel):
+    text: str
+    age: int
+    medical_conditions: Optional[List[str]] = []
+    weight_kg: Optional[float] = None
+
+class InteractionResult(BaseModel):
+    severity: str
+    description: str
+    drugs_involved: List[str]
+
+class DosageRecommendation(BaseModel):
+    drug_name: str
+    recommended_dosage: str
+    age_group: str
+    warnings: List[str]
+
+class AlternativeDrug(BaseModel):
+    name: str
+    reason: str
+    dosage: str
+
+class ExtractionDocument(BaseModel):
+    id: str
+    text: str
+
+class ExtractionBatch(BaseModel):
+    documents: List[ExtractionDocument]
+    chunksize: Optional[int] = None
+
+class JobSubmission(BaseModel):
+    profiles: List[PatientProfile]
+    priority: int = 0
+
+class InteractionUpdate(BaseModel):
+    drugs: List[str]
+    severity: Severity
+    description: str
+
+class ShadowConfig(BaseModel):
+    sample_rate: float = 0.1
+    # Candidate = the current knowledge base, optionally with the data files reloaded, plus these interactions
+    reload_files: bool = False
+    interactions: List[InteractionUpdate] = []
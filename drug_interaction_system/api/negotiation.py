@@ -0,0 +1,152 @@
+import functools
+import inspect
+import json
+from contextvars import ContextVar
+from typing import Any, Callable
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from tracing import tracer
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Response format picked from the Accept header of the request being handled
+_response_format: ContextVar[str] = ContextVar("response_format", default=JSON_MEDIA_TYPE)
+
+
+def _media_type(header_value: str) -> str:
+    return header_value.split(";", 1)[0].strip().lower()
+
+
+def wants_msgpack(accept: str) -> bool:
+    """True when the Accept header ranks MessagePack at least as high as JSON."""
+    if not accept:
+        return False
+
+    msgpack_q = json_q = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def response_is_msgpack() -> bool:
+    return _response_format.get() == MSGPACK_MEDIA_TYPE
+
+
+class NegotiatedRequest(Request):
+    """Request whose body may be MessagePack.
+
+    FastAPI only hands JSON bodies to the model validators, so a MessagePack
+    request is presented as JSON and decoded here; the same Pydantic models
+    then validate both formats.
+    """
+
+    def __init__(self, scope, receive):
+        headers = scope.get("headers", [])
+        self.body_is_msgpack = any(
+            name == b"content-type" and _media_type(value.decode("latin-1")) in MSGPACK_MEDIA_TYPES
+            for name, value in headers
+        )
+        if self.body_is_msgpack:
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, JSON_MEDIA_TYPE.encode()) if name == b"content-type" else (name, value)
+                for name, value in headers
+            ]
+        super().__init__(scope, receive)
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            with tracer.span("decode", format="msgpack" if self.body_is_msgpack else "json"):
+                self._json = msgpack.unpackb(body) if self.body_is_msgpack else json.loads(body)
+            # Model validation runs next; the endpoint closes this span when it is entered
+            tracer.start_pending("validate")
+        return self._json
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON response that switches to MessagePack when the client asked for it."""
+
+    def __init__(self, content: Any, *args, **kwargs):
+        if response_is_msgpack():
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, *args, **kwargs)
+        self.headers["vary"] = "Accept"
+
+    def render(self, content: Any) -> bytes:
+        is_msgpack = self.media_type == MSGPACK_MEDIA_TYPE
+        with tracer.span("serialize", format="msgpack" if is_msgpack else "json"):
+            if is_msgpack:
+                return msgpack.packb(content)
+            return super().render(content)
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an endpoint in a "handler" span; the wrapper keeps its signature for FastAPI."""
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def traced(*args, **kwargs):
+        tracer.end_pending()
+        with tracer.span("handler", endpoint=endpoint.__name__):
+            return await endpoint(*args, **kwargs)
+
+    return traced
+
+
+class NegotiatedRoute(APIRoute):
+    """Route that decodes JSON or MessagePack bodies and answers in the format the client accepts."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # An explicit response class keeps FastAPI off its JSON-only serialization fast path
+        response_class = kwargs.get("response_class")
+        if isinstance(response_class, DefaultPlaceholder):
+            kwargs["response_class"] = response_class.value
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            accept = request.headers.get("accept", "")
+            token = _response_format.set(MSGPACK_MEDIA_TYPE if wants_msgpack(accept) else JSON_MEDIA_TYPE)
+            try:
+                return await handler(NegotiatedRequest(request.scope, request.receive))
+            finally:
+                # Still open if validation failed before the endpoint was reached
+                tracer.end_pending()
+                _response_format.reset(token)
+
+        return negotiated_handler
+
+
+def stream_media_type() -> str:
+    return MSGPACK_MEDIA_TYPE if response_is_msgpack() else NDJSON_MEDIA_TYPE
+
+
+def encode_stream_item(item: Any, as_msgpack: bool) -> bytes:
+    """One record of a streamed response: a MessagePack object or an NDJSON line."""
+    if as_msgpack:
+        return msgpack.packb(item)
+    return (json.dumps(item) + "\n").encode()
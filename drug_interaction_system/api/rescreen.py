@@ -0,0 +1,170 @@
+import itertools
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+import engine
+from knowledge_base import KnowledgeBase
+from models import PatientProfile
+
+# Alerts older than this many entries are dropped from the log
+ALERT_LOG_SIZE = 10000
+
+
+def screen_regimen(patient: PatientProfile, kb: KnowledgeBase) -> Dict[tuple, dict]:
+    """The findings re-screening watches for, keyed so old and new results can be compared.
+
+    Keys include the severity, so an escalation counts as a new finding;
+    overdoses are keyed by ingredient alone, so a lower limit on a regimen
+    that was already overdosing doesn't raise it again.
+    """
+    findings = {}
+    for interaction in engine.analyze_interactions(patient, kb):
+        drugs = tuple(sorted(interaction["drugs_involved"]))
+        findings[("interaction",) + drugs + (interaction["severity"],)] = {"kind": "interaction", **interaction}
+    for warning in engine.overdose_warnings(patient, kb):
+        findings[("overdose", warning["drug"])] = {"kind": "overdose", **warning}
+    for finding in engine.screen_contraindications(patient, kb):
+        key = ("contraindication", finding["condition"], finding["drug"], finding["severity"])
+        findings[key] = {"kind": "contraindication", **finding}
+    return findings
+
+
+def _dosage_row(kb: KnowledgeBase, drug: str) -> Optional[tuple]:
+    tables = kb.dosage_tables
+    row = tables.drug_index.get(drug)
+    if row is None:
+        return None
+    return (tables.recommended_table[row], tables.max_daily_table[row],
+            tables.max_daily_per_kg_table[row], tables.drug_warnings_table[row])
+
+
+def changed_drugs(old: KnowledgeBase, new: KnowledgeBase) -> Set[str]:
+    """Drug names whose screening can differ between two knowledge bases.
+
+    Every rule is attributed to the drugs it mentions. Changed product
+    ingredients mark the product, and a changed ingredient marks every
+    product containing it, so regimens only need indexing by the names
+    they list.
+    """
+    changed = set()
+
+    for pair in old.interactions.keys() | new.interactions.keys():
+        if old.interactions.get(pair) != new.interactions.get(pair):
+            changed.update(pair)
+
+    if old.dosage_tables.band_by_age != new.dosage_tables.band_by_age:
+        changed.update(old.dosage_tables.drug_index)
+        changed.update(new.dosage_tables.drug_index)
+    else:
+        for drug in old.dosage_tables.drug_index.keys() | new.dosage_tables.drug_index.keys():
+            if _dosage_row(old, drug) != _dosage_row(new, drug):
+                changed.add(drug)
+
+    old_conditions, new_conditions = old.condition_index, new.condition_index
+    for condition in old_conditions.index.keys() | new_conditions.index.keys():
+        old_rules = old_conditions.index.get(condition, {})
+        new_rules = new_conditions.index.get(condition, {})
+        for drug in old_rules.keys() | new_rules.keys():
+            if old_rules.get(drug) != new_rules.get(drug):
+                changed.add(drug)
+    for name in old_conditions.synonyms.keys() | new_conditions.synonyms.keys():
+        if old_conditions.synonyms.get(name) != new_conditions.synonyms.get(name):
+            for condition in (old_conditions.synonyms.get(name), new_conditions.synonyms.get(name)):
+                changed.update(old_conditions.index.get(condition, {}))
+                changed.update(new_conditions.index.get(condition, {}))
+
+    for product in old.products.keys() | new.products.keys():
+        if old.products.get(product) != new.products.get(product):
+            changed.add(product)
+    for product, ingredients in itertools.chain(old.products.items(), new.products.items()):
+        if changed & ingredients.keys():
+            changed.add(product)
+
+    return changed
+
+
+class AlertLog:
+    """Bounded log of newly raised findings, read incrementally by sequence number."""
+
+    def __init__(self, size: int = ALERT_LOG_SIZE):
+        self._alerts = deque(maxlen=size)
+        self._seq = itertools.count(1)
+
+    def publish(self, regimen_id: str, kb_version: int, findings: Iterable[dict]) -> List[dict]:
+        published = []
+        for finding in findings:
+            alert = {"seq": next(self._seq), "regimen_id": regimen_id, "kb_version": kb_version,
+                     "raised_at": time.time(), "finding": finding}
+            self._alerts.append(alert)
+            published.append(alert)
+        return published
+
+    def since(self, seq: int, limit: int = 1000) -> List[dict]:
+        return list(itertools.islice((alert for alert in self._alerts if alert["seq"] > seq), limit))
+
+
+class RegimenRegistry:
+    """Active regimens, their last findings, and an inverted index from drug name to regimen.
+
+    When the knowledge base changes, only regimens listing a changed drug
+    are screened again, so the cost follows the number of affected patients.
+    """
+
+    def __init__(self, alerts: Optional[AlertLog] = None):
+        self.regimens: Dict[str, PatientProfile] = {}
+        self.findings: Dict[str, Dict[tuple, dict]] = {}
+        self.by_drug: Dict[str, Set[str]] = {}
+        self.alerts = alerts or AlertLog()
+
+    def _drug_names(self, patient: PatientProfile) -> Set[str]:
+        return {drug.name.lower().strip() for drug in patient.drugs}
+
+    def register(self, regimen_id: str, patient: PatientProfile, kb: KnowledgeBase) -> List[dict]:
+        """Add or replace a regimen; returns its current findings."""
+        self.remove(regimen_id)
+        self.regimens[regimen_id] = patient
+        self.findings[regimen_id] = screen_regimen(patient, kb)
+        for drug in self._drug_names(patient):
+            self.by_drug.setdefault(drug, set()).add(regimen_id)
+        return list(self.findings[regimen_id].values())
+
+    def remove(self, regimen_id: str) -> bool:
+        patient = self.regimens.pop(regimen_id, None)
+        if patient is None:
+            return False
+        del self.findings[regimen_id]
+        for drug in self._drug_names(patient):
+            regimen_ids = self.by_drug.get(drug)
+            if regimen_ids is not None:
+                regimen_ids.discard(regimen_id)
+                if not regimen_ids:
+                    del self.by_drug[drug]
+        return True
+
+    def affected(self, drugs: Iterable[str]) -> Set[str]:
+        regimen_ids = set()
+        for drug in drugs:
+            regimen_ids.update(self.by_drug.get(drug, ()))
+        return regimen_ids
+
+    def rescreen(self, old: KnowledgeBase, new: KnowledgeBase) -> dict:
+        """Re-screen the regimens a knowledge base change can affect and publish new findings."""
+        started = time.perf_counter()
+        drugs = changed_drugs(old, new)
+        affected = self.affected(drugs)
+        alerts = []
+        for regimen_id in sorted(affected):
+            previous = self.findings[regimen_id]
+            current = screen_regimen(self.regimens[regimen_id], new)
+            self.findings[regimen_id] = current
+            raised = [finding for key, finding in current.items() if key not in previous]
+            alerts.extend(self.alerts.publish(regimen_id, new.version, raised))
+        return {
+            "kb_version": new.version,
+            "changed_drugs": sorted(drugs),
+            "regimens": len(self.regimens),
+            "rescreened": len(affected),
+            "alerts": alerts,
+            "elapsed_ms": (time.perf_counter() - started) * 1000
+        }
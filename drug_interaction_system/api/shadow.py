@@ -0,0 +1,197 @@
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import engine
+from knowledge_base import KnowledgeBase
+from models import PatientProfile
+from rescreen import screen_regimen
+from tenants import TenantKnowledgeBase, build_overlay
+
+# Differing requests kept in full for inspection
+SHADOW_EXAMPLES = 20
+TOP_FINDINGS = 20
+# Shadow workers run at a lower CPU priority than the API process
+SHADOW_NICENESS = 10
+
+
+def shadow_findings(patient: PatientProfile, kb: KnowledgeBase) -> Dict[tuple, dict]:
+    """What a patient is warned about under one knowledge base, keyed by finding rather than its details.
+
+    Builds on the re-screening findings with the severity dropped from the
+    key, so a severity change reads as a changed finding instead of one
+    removed and one new, and adds the dosage recommendations so that
+    dosage rule changes show up even when they don't cause an overdose.
+    """
+    findings = {}
+    for key, finding in screen_regimen(patient, kb).items():
+        findings[key[:-1] if key[0] != "overdose" else key] = finding
+    for recommendation in engine.dosage_recommendations(patient, kb):
+        findings[("dosage", recommendation["drug_name"])] = {"kind": "dosage", **recommendation}
+    return findings
+
+
+def diff_findings(primary: Dict[tuple, dict], candidate: Dict[tuple, dict]) -> Dict[str, Dict[tuple, dict]]:
+    """Findings only the candidate raises, only the primary raises, and raised by both with different details."""
+    return {
+        "new": {key: candidate[key] for key in candidate.keys() - primary.keys()},
+        "removed": {key: primary[key] for key in primary.keys() - candidate.keys()},
+        "changed": {key: {"primary": primary[key], "candidate": candidate[key]}
+                    for key in primary.keys() & candidate.keys() if primary[key] != candidate[key]}
+    }
+
+
+# Set in each shadow worker process by `_init_worker`: the primary and candidate
+# base knowledge bases, the tenant specs, and overlays built from them on demand
+_worker_bases: Dict[str, KnowledgeBase] = {}
+_worker_tenant_specs: Dict[str, dict] = {}
+_worker_overlays: Dict[Tuple[str, str], TenantKnowledgeBase] = {}
+
+
+def _init_worker(primary: KnowledgeBase, candidate: KnowledgeBase, tenant_specs: Dict[str, dict]):
+    global _worker_bases, _worker_tenant_specs, _worker_overlays
+    if hasattr(os, "nice"):
+        os.nice(SHADOW_NICENESS)
+    _worker_bases = {"primary": primary, "candidate": candidate}
+    _worker_tenant_specs = tenant_specs
+    _worker_overlays = {}
+
+
+def _worker_kb(side: str, tenant_id: Optional[str]) -> KnowledgeBase:
+    """One side's knowledge base as a request's tenant sees it: the tenant overlay rebuilt over that base."""
+    base = _worker_bases[side]
+    if tenant_id is None:
+        return base
+    overlay = _worker_overlays.get((side, tenant_id))
+    if overlay is None:
+        spec = _worker_tenant_specs.get(tenant_id, {})
+        overlay = _worker_overlays[(side, tenant_id)] = build_overlay(base, tenant_id, spec)
+    return overlay
+
+
+def _evaluate(patient: PatientProfile, tenant_id: Optional[str]) -> Dict[str, Dict[tuple, dict]]:
+    """Runs in a shadow worker: the findings diff of one request."""
+    return diff_findings(shadow_findings(patient, _worker_kb("primary", tenant_id)),
+                         shadow_findings(patient, _worker_kb("candidate", tenant_id)))
+
+
+class ShadowEvaluator:
+    """Re-evaluates a sample of live requests against a candidate knowledge base and tallies the differences.
+
+    Evaluation runs in a small pool of worker processes at a lower CPU
+    priority, so it never holds the API process's GIL; each worker receives
+    the primary and candidate knowledge bases once, at start. Sampled
+    requests take one of a fixed number of pending slots; when every slot
+    is taken the request is dropped and counted rather than queued, so the
+    request path never waits on shadow work. Requests screened against a
+    different base than the one the shadow started with (after a reload)
+    are skipped and counted as stale.
+    """
+
+    def __init__(self, primary: KnowledgeBase, candidate: KnowledgeBase, sample_rate: float,
+                 tenant_specs: Optional[Dict[str, dict]] = None, workers: int = 1, max_pending: int = 64):
+        self.primary = primary
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.started_at = time.time()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(primary, candidate, tenant_specs or {}))
+        # Start the workers now rather than on the first mirrored request
+        self._executor.submit(int)
+        self._lock = threading.Lock()
+        self._stopped = False
+        self.last_error: Optional[str] = None
+
+        self.counters = Counter()
+        self.by_endpoint = Counter()
+        self.by_change = Counter()
+        self.by_finding = Counter()
+        self.examples = deque(maxlen=SHADOW_EXAMPLES)
+
+    def offer(self, endpoint: str, patient: PatientProfile, primary: KnowledgeBase) -> bool:
+        """Maybe mirror one request; returns whether it was queued. Never blocks."""
+        if self._stopped or random.random() >= self.sample_rate:
+            return False
+        tenant_id = primary.tenant_id if isinstance(primary, TenantKnowledgeBase) else None
+        base = primary.base if tenant_id is not None else primary
+        with self._lock:
+            self.counters["sampled"] += 1
+            self.by_endpoint[endpoint] += 1
+            if base is not self.primary:
+                self.counters["stale"] += 1
+                return False
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.counters["dropped"] += 1
+            return False
+        try:
+            future = self._executor.submit(_evaluate, patient, tenant_id)
+        except RuntimeError:
+            # Shut down between the check above and here
+            self._slots.release()
+            return False
+        future.add_done_callback(lambda f: self._record(f, endpoint, patient))
+        return True
+
+    def _record(self, future: Future, endpoint: str, patient: PatientProfile):
+        self._slots.release()
+        if future.cancelled():
+            return
+        error = future.exception()
+        with self._lock:
+            if error is not None:
+                self.counters["errors"] += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+                return
+            diff = future.result()
+            self.counters["evaluated"] += 1
+            if not any(diff.values()):
+                return
+            self.counters["differing"] += 1
+            for change, findings in diff.items():
+                for key in findings:
+                    self.by_change[f"{key[0]}:{change}"] += 1
+                    self.by_finding[(change,) + key] += 1
+            self.examples.append({
+                "endpoint": endpoint,
+                "evaluated_at": time.time(),
+                "patient": patient.model_dump(),
+                "new": list(diff["new"].values()),
+                "removed": list(diff["removed"].values()),
+                "changed": list(diff["changed"].values())
+            })
+
+    def report(self) -> dict:
+        with self._lock:
+            evaluated = self.counters["evaluated"]
+            return {
+                "candidate_version": self.candidate.version,
+                "sample_rate": self.sample_rate,
+                "started_at": self.started_at,
+                "running": not self._stopped,
+                "sampled": self.counters["sampled"],
+                "evaluated": evaluated,
+                "dropped": self.counters["dropped"],
+                "stale": self.counters["stale"],
+                "errors": self.counters["errors"],
+                "last_error": self.last_error,
+                "differing": self.counters["differing"],
+                "differing_rate": self.counters["differing"] / evaluated if evaluated else 0.0,
+                "by_endpoint": dict(self.by_endpoint),
+                "by_change": dict(self.by_change),
+                "top_findings": [
+                    {"change": key[0], "kind": key[1], "subject": list(key[2:]), "requests": count}
+                    for key, count in self.by_finding.most_common(TOP_FINDINGS)
+                ],
+                "examples": list(self.examples)
+            }
+
+    def stop(self):
+        """Stop mirroring; queued evaluations are discarded."""
+        self._stopped = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
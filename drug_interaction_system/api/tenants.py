@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+from collections import ChainMap
+from typing import Dict, List, Optional, Tuple
+
+from dosage_rules import DosageTables
+from knowledge_base import DATA_DIR, SEVERITIES, KnowledgeBase, interaction_key
+
+TENANTS_PATH = os.environ.get("TENANTS_PATH", os.path.join(DATA_DIR, "tenants.json"))
+TENANT_HEADER = "X-Tenant-ID"
+
+
+def capped_dosage_tables(base: DosageTables, dose_caps: Dict[str, Dict[str, float]]) -> DosageTables:
+    """Dosage tables with lower daily maximums for some drugs, sharing everything else with `base`.
+
+    Only the max-daily rows of capped drugs are copied; the outer row list
+    is new but holds the base rows for every other drug.
+    """
+    if not dose_caps:
+        return base
+    max_daily = list(base.max_daily_table)
+    for drug, caps in dose_caps.items():
+        row = base.drug_index.get(drug.lower())
+        if row is None:
+            continue
+        capped = list(max_daily[row])
+        for band, band_name in enumerate(base.band_names):
+            cap = caps.get(band_name, caps.get("*"))
+            if cap is not None:
+                capped[band] = min(capped[band], cap) if capped[band] else cap
+        max_daily[row] = capped
+    return DosageTables(base.band_names, base.band_by_age, base.drug_index, base.recommended_table, max_daily,
+                        base.max_daily_per_kg_table, base.drug_warnings_table, base.age_warnings_table,
+                        base.weight_warnings)
+
+
+class TenantKnowledgeBase(KnowledgeBase):
+    """One tenant's view of a shared base knowledge base.
+
+    Local interactions sit in a small dict in front of the base
+    interactions, dose caps replace only the affected dosage rows, and
+    everything else is the base object itself, so a tenant costs its own
+    changes rather than a copy of the base. Lookups are the base lookups
+    plus at most one dict probe.
+    """
+
+    def __init__(self, base: KnowledgeBase, tenant_id: str, restricted_drugs=(),
+                 interactions: Optional[Dict[Tuple[str, str], dict]] = None,
+                 dose_caps: Optional[Dict[str, Dict[str, float]]] = None):
+        self.base = base
+        self.tenant_id = tenant_id
+        self.local_interactions = {
+            interaction_key(drug1.lower(), drug2.lower()): info for (drug1, drug2), info in (interactions or {}).items()
+        }
+        self.interactions = ChainMap(self.local_interactions, base.interactions)
+        self.dosage_tables = capped_dosage_tables(base.dosage_tables, dose_caps or {})
+        self.alternatives = base.alternatives
+        self.drug_classes = base.drug_classes
+        self.condition_index = base.condition_index
+        self.products = base.products
+        self.version = base.version
+        self.restricted_drugs = frozenset(drug.lower() for drug in restricted_drugs)
+
+    @property
+    def identity(self) -> tuple:
+        return ("tenant", self.tenant_id) + self.base.identity
+
+    def interaction(self, drug1: str, drug2: str) -> Optional[dict]:
+        key = interaction_key(drug1, drug2)
+        info = self.local_interactions.get(key)
+        return info if info is not None else self.base.interactions.get(key)
+
+    def drug_alternatives(self, drug_name: str) -> List[dict]:
+        alternatives = self.base.drug_alternatives(drug_name)
+        if not self.restricted_drugs:
+            return alternatives
+        return [alt for alt in alternatives if alt["name"].lower() not in self.restricted_drugs]
+
+    def with_interaction(self, drug1: str, drug2: str, info: dict) -> KnowledgeBase:
+        raise TypeError("Tenant knowledge bases change through their overlay spec, not directly")
+
+
+def build_overlay(base: KnowledgeBase, tenant_id: str, spec: dict) -> TenantKnowledgeBase:
+    """Layer one tenant's spec (see data/tenants.json) over the base knowledge base."""
+    interactions = {}
+    for rule in spec.get("interactions", []):
+        drugs = rule["drugs"]
+        if len(drugs) != 2:
+            raise ValueError(f"Tenant {tenant_id}: an interaction needs exactly two drugs, got {drugs}")
+        if rule["severity"] not in SEVERITIES:
+            raise ValueError(f"Tenant {tenant_id}: severity must be one of {', '.join(SEVERITIES)}, got {rule['severity']!r}")
+        interactions[(drugs[0], drugs[1])] = {"severity": rule["severity"], "description": rule["description"]}
+    dose_caps = {}
+    for drug, caps in spec.get("dose_caps", {}).items():
+        # A bare number caps every age band
+        dose_caps[drug] = caps if isinstance(caps, dict) else {"*": caps}
+        unknown = set(dose_caps[drug]) - set(base.dosage_tables.band_names) - {"*"}
+        if unknown:
+            raise ValueError(f"Tenant {tenant_id}: unknown age band(s) {sorted(unknown)} in dose caps for {drug}")
+    return TenantKnowledgeBase(base, tenant_id, spec.get("restricted_drugs", []), interactions, dose_caps)
+
+
+class TenantRegistry:
+    """Tenant specs, with overlays built on first use and rebuilt when the base changes."""
+
+    def __init__(self, specs: Dict[str, dict]):
+        self.specs = specs
+        self._overlays: Dict[str, TenantKnowledgeBase] = {}
+        self._lock = threading.Lock()
+
+    def knowledge_base(self, tenant_id: str, base: KnowledgeBase) -> TenantKnowledgeBase:
+        """The tenant's overlay over `base`; raises KeyError for an unknown tenant."""
+        overlay = self._overlays.get(tenant_id)
+        if overlay is not None and overlay.base is base:
+            return overlay
+        spec = self.specs[tenant_id]
+        with self._lock:
+            overlay = self._overlays.get(tenant_id)
+            if overlay is None or overlay.base is not base:
+                overlay = self._overlays[tenant_id] = build_overlay(base, tenant_id, spec)
+        return overlay
+
+    def loaded(self) -> Dict[str, TenantKnowledgeBase]:
+        return dict(self._overlays)
+
+
+def load_tenants(path: str = TENANTS_PATH) -> TenantRegistry:
+    """Tenant specs from `path`; no tenants when the file doesn't exist."""
+    if not os.path.exists(path):
+        return TenantRegistry({})
+    with open(path, encoding="utf-8") as f:
+        return TenantRegistry(json.load(f).get("tenants", {}))
@@ -0,0 +1,191 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rolling exposure is measured over this many hours, the span of a "max daily" limit
+EXPOSURE_WINDOW_HOURS = 24
+MAX_WINDOW_HOURS = 24 * 28
+
+_EVERY = re.compile(
+    r'every\s*(\d+(?:\.\d+)?)(?:\s*(?:-|to)\s*\d+(?:\.\d+)?)?\s*(hours?|hrs?|h\b|days?|weeks?)'
+)
+_TIMES_A_DAY = re.compile(r'(\d+)\s*(?:x|times)\s*(?:a|per|/)?\s*(?:day|daily)')
+_WORD_TIMES = {"once": 1, "twice": 2, "three times": 3, "four times": 4}
+_ABBREVIATIONS = {"od": 1, "bid": 2, "bd": 2, "tid": 3, "tds": 3, "qid": 4, "qds": 4}
+_UNIT_HOURS = {"h": 1, "hr": 1, "hrs": 1, "hour": 1, "hours": 1, "day": 24, "days": 24,
+               "week": 168, "weeks": 168}
+_AMOUNT = re.compile(r'(\d+(?:\.\d+)?)\s*([a-zµ]+)?')
+_MG_PER_UNIT = {"mg": 1, "milligram": 1, "milligrams": 1, "g": 1000, "gram": 1000, "grams": 1000,
+                "mcg": 0.001, "ug": 0.001, "µg": 0.001, "microgram": 0.001, "micrograms": 0.001}
+_UNIT_COUNT = re.compile(r'(\d+(?:\.\d+)?)\s*(?:tablets?|tabs?|capsules?|caps?|pills?)\b')
+
+
+def parse_frequency(frequency: str) -> float:
+    """Hours between doses. Unrecognised or as-needed frequencies count as once a day.
+
+    For ranges like "every 4-6 hours" the shorter interval is used, since that
+    is the most a patient can take while following the label.
+    """
+    text = (frequency or "").lower()
+
+    match = _EVERY.search(text)
+    if match:
+        hours = float(match.group(1)) * _UNIT_HOURS[match.group(2)]
+        return hours if hours > 0 else 24.0
+
+    match = _TIMES_A_DAY.search(text)
+    if match and int(match.group(1)):
+        return 24.0 / int(match.group(1))
+
+    for words, times in _WORD_TIMES.items():
+        if re.search(rf'\b{words}\s*(?:a|per)?\s*(?:day|daily)', text):
+            return 24.0 / times
+    for abbreviation, times in _ABBREVIATIONS.items():
+        if re.search(rf'\b{abbreviation}\b', text):
+            return 24.0 / times
+
+    if "weekly" in text or "once a week" in text:
+        return 168.0
+    return 24.0
+
+
+def extract_dosage_amount(dosage_str: str) -> float:
+    """The first amount in a dosage string, in mg.
+
+    Grams and micrograms are converted and a bare number is read as mg.
+    Any other unit (ml, tablets, IU) is not a mass, so the amount is 0 and
+    the entry adds nothing to an exposure.
+    """
+    if not dosage_str:
+        return 0
+    match = _AMOUNT.search(dosage_str.lower())
+    if not match:
+        return 0
+    amount, unit = float(match.group(1)), match.group(2)
+    if unit is None:
+        return amount
+    return amount * _MG_PER_UNIT.get(unit, 0)
+
+
+def ingredient_doses(drug_name: str, dosage: str, products: Dict[str, Dict[str, float]],
+                     amount_mg: Optional[float] = None) -> List[Tuple[str, float]]:
+    """The (ingredient, mg) pairs taken with one dose of a drug or product.
+
+    Products are dosed in units ("2 tablets"); a plain mg amount is only
+    meaningful for single-ingredient products and plain drugs. `amount_mg`,
+    when already known, is used instead of parsing it from `dosage`.
+    """
+    if amount_mg is None:
+        amount_mg = extract_dosage_amount(dosage)
+    product = products.get(drug_name)
+    if product is None:
+        return [(drug_name, amount_mg)]
+
+    match = _UNIT_COUNT.search((dosage or "").lower())
+    if match:
+        units = float(match.group(1))
+    elif len(product) == 1 and amount_mg:
+        return [(next(iter(product)), amount_mg)]
+    else:
+        units = 1
+    return [(ingredient, mg * units) for ingredient, mg in product.items()]
+
+
+def rolling_exposure(group: np.ndarray, interval_min: np.ndarray, amount: np.ndarray,
+                     window_min: int, n_groups: int,
+                     exposure_min: int = EXPOSURE_WINDOW_HOURS * 60) -> dict:
+    """Peak rolling exposure per group for dose components repeated over a window.
+
+    Each component i is a dose of `amount[i]` mg every `interval_min[i]`
+    minutes from time 0, counted towards `group[i]`. All components expand
+    to one event array; events are sorted by (group, time) on a single key
+    with a gap larger than the exposure window between groups, so one
+    `searchsorted` finds the end of every event's exposure window and a
+    cumulative sum gives all window totals at once.
+    """
+    counts = -(-window_min // interval_min)
+    component = np.repeat(np.arange(len(counts)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    times = (np.arange(len(component)) - starts) * interval_min[component]
+
+    stride = window_min + exposure_min
+    key = group[component] * stride + times
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    event_group = group[component][order]
+    event_amount = amount[component][order]
+
+    cumulative = np.concatenate(([0.0], np.cumsum(event_amount)))
+    window_end = np.searchsorted(key, key + exposure_min, side="left")
+    exposure = cumulative[window_end] - cumulative[:-1]
+
+    peak = np.zeros(n_groups)
+    np.maximum.at(peak, event_group, exposure)
+    # First event of each group reaching the peak marks when it is reached
+    at_peak = np.flatnonzero(exposure >= peak[event_group])
+    first_groups, first = np.unique(event_group[at_peak], return_index=True)
+    peak_at = np.zeros(n_groups)
+    peak_at[first_groups] = (key[at_peak[first]] - first_groups * stride) / 60
+
+    return {
+        "peak": peak,
+        "peak_at_hour": peak_at,
+        "total": np.bincount(event_group, weights=event_amount, minlength=n_groups),
+        "doses": np.bincount(event_group, minlength=n_groups)
+    }
+
+
+def dosing_timelines(regimens: Sequence[dict], window_hours: float, products: Dict[str, Dict[str, float]],
+                     max_daily) -> List[List[dict]]:
+    """Rolling per-ingredient exposure for a batch of regimens.
+
+    `regimens` are {"age", "weight_kg", "drugs"} dicts with drug dicts as in
+    `PatientProfile`. A drug that already carries its parsed `amount_mg` and
+    `interval_hours` (as extracted mentions do) is not parsed again.
+    `max_daily(ingredient, age, weight_kg)` gives the daily
+    limit in mg (0 for none). Every (regimen, ingredient) pair is one group,
+    so the whole batch is evaluated in a single vectorized pass.
+    """
+    groups: Dict[Tuple[int, str], int] = {}
+    sources: List[List[str]] = []
+    group, interval, amount = [], [], []
+    for index, regimen in enumerate(regimens):
+        for drug in regimen["drugs"]:
+            drug_name = drug["name"].lower().strip()
+            interval_hours = drug.get("interval_hours") or parse_frequency(drug.get("frequency") or "")
+            interval_min = max(int(round(interval_hours * 60)), 1)
+            for ingredient, mg in ingredient_doses(drug_name, drug.get("dosage") or "", products,
+                                                   drug.get("amount_mg")):
+                if not mg:
+                    continue
+                group_id = groups.setdefault((index, ingredient), len(groups))
+                if group_id == len(sources):
+                    sources.append([])
+                if drug_name not in sources[group_id]:
+                    sources[group_id].append(drug_name)
+                group.append(group_id)
+                interval.append(interval_min)
+                amount.append(mg)
+
+    timelines: List[List[dict]] = [[] for _ in regimens]
+    if not groups:
+        return timelines
+
+    exposure = rolling_exposure(np.array(group, dtype=np.int64), np.array(interval, dtype=np.int64),
+                                np.array(amount, dtype=float), int(round(window_hours * 60)), len(groups))
+    for (index, ingredient), group_id in sorted(groups.items()):
+        regimen = regimens[index]
+        limit = max_daily(ingredient, regimen["age"], regimen.get("weight_kg")) or None
+        peak = float(exposure["peak"][group_id])
+        timelines[index].append({
+            "ingredient": ingredient,
+            "sources": sources[group_id],
+            "doses_in_window": int(exposure["doses"][group_id]),
+            "window_total_mg": float(exposure["total"][group_id]),
+            "peak_24h_mg": peak,
+            "peak_at_hour": float(exposure["peak_at_hour"][group_id]),
+            "max_daily_mg": limit,
+            "is_overdose": bool(limit and peak > limit)
+        })
+    return timelines
@@ -0,0 +1,232 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+TRACEPARENT_HEADER = "traceparent"
+
+
+class Span:
+    """One timed stage of a trace. Finished spans are buffered on the trace
+    and handed to the exporter together when the root span ends."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "status",
+                 "start_time", "_start", "_trace_spans", "_is_root")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str],
+                 trace_spans: List[dict], is_root: bool):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes: Dict[str, object] = {}
+        self.status = "ok"
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self._trace_spans = trace_spans
+        self._is_root = is_root
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+class SpanExporter:
+    """Receives the finished spans of one trace at a time. The base exporter
+    discards them; subclasses override `export` to send them somewhere."""
+
+    def export(self, spans: List[dict]):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: List[dict]):
+        lines = "".join(json.dumps(span) + "\n" for span in spans)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def parse_traceparent(header: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent header, or None."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class Tracer:
+    """Sampled span tracer.
+
+    Sampling is decided once per trace, at the root: an incoming traceparent
+    header's sampled flag is honoured, otherwise `sample_rate` applies.
+    Inside an unsampled trace, `span()` is a context-variable read and
+    nothing else.
+    """
+
+    def __init__(self, service: str = "api", exporter: Optional[SpanExporter] = None,
+                 sample_rate: float = 0.0):
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        self._pending: ContextVar[Optional[Span]] = ContextVar("pending_span", default=None)
+
+    def configure(self, service: str, exporter: Optional[SpanExporter], sample_rate: float):
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def configure_from_env(self, service: str):
+        """Export to TRACE_EXPORT_PATH (JSON lines) at TRACE_SAMPLE_RATE; off when no path is set."""
+        path = os.environ.get("TRACE_EXPORT_PATH")
+        sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", "0.01"))
+        self.configure(service, JsonLinesExporter(path) if path else None, sample_rate)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None) -> Optional[Span]:
+        """Start a root span (continuing a remote parent if given), or None if not sampled."""
+        if self.exporter is None:
+            return None
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = None, None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return None
+        trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        return Span(name, trace_id, parent_id, [], is_root=True)
+
+    def start_span(self, name: str) -> Optional[Span]:
+        """Start a child of the current span without making it current."""
+        parent = self._current.get()
+        if parent is None:
+            return None
+        return Span(name, parent.trace_id, parent.span_id, parent._trace_spans, is_root=False)
+
+    def end_span(self, span: Optional[Span]):
+        if span is None:
+            return
+        span._trace_spans.append({
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "service": self.service,
+            "start_time": span.start_time,
+            "duration_ms": (time.perf_counter() - span._start) * 1000,
+            "status": span.status,
+            "attributes": span.attributes
+        })
+        if span._is_root and self.exporter is not None:
+            self.exporter.export(span._trace_spans)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]):
+        """Make `span` current for the block and end it afterwards."""
+        if span is None:
+            yield None
+            return
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            self._current.reset(token)
+            self.end_span(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = self._current.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(name, parent.trace_id, parent.span_id, parent._trace_spans, is_root=False)
+        span.attributes.update(attributes)
+        with self.activate(span):
+            yield span
+
+    def start_pending(self, name: str):
+        """Open a span that a later stage of the same request closes with `end_pending`."""
+        self._pending.set(self.start_span(name))
+
+    def end_pending(self):
+        span = self._pending.get()
+        if span is not None:
+            self._pending.set(None)
+            self.end_span(span)
+
+
+# Process-wide tracer, configured by the API and the frontend at startup
+tracer = Tracer()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of each HTTP request."""
+
+    def __init__(self, app, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = self.tracer.start_trace(f"{scope['method']} {scope['path']}", traceparent)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = "error"
+            await send(message)
+
+        with self.tracer.activate(root):
+            await self.app(scope, receive, traced_send)
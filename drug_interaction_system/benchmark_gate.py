@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from engine import dispense_gate
+from knowledge_base import get_knowledge_base
+
+P99_BUDGET_MS = 1.0
+
+REGIMEN = [
+    {"name": "metformin", "dosage": "500mg", "frequency": "twice daily"},
+    {"name": "co-codamol", "dosage": "2 tablets", "frequency": "every 6 hours"},
+    {"name": "lisinopril", "dosage": "10mg", "frequency": "once daily"},
+    {"name": "aspirin", "dosage": "75mg", "frequency": "daily"},
+    {"name": "omeprazole", "dosage": "20mg", "frequency": "once daily"},
+    {"name": "atorvastatin", "dosage": "40mg", "frequency": "once daily"}
+]
+
+# Name -> candidate; covers the allowed path (every check runs) and both blocking findings
+CASES = {
+    "allowed": {"name": "ibuprofen", "dosage": "200mg", "frequency": "every 8 hours"},
+    "high_interaction": {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+    "overdose": {"name": "paracetamol", "dosage": "1000mg", "frequency": "every 6 hours"}
+}
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def bench(request, kb, rounds):
+    """Per-call wall time in ms, from JSON body bytes to the answer, as the endpoint does it"""
+    body = json.dumps(request).encode()
+    for _ in range(100):
+        dispense_gate(json.loads(body), kb)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        dispense_gate(json.loads(body), kb)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the dispense gate, in-process")
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--check", action="store_true", help=f"Exit with status 1 if p99 exceeds {P99_BUDGET_MS}ms")
+    args = parser.parse_args()
+
+    kb = get_knowledge_base()
+    print(f"{'case':<18} {'answer':<12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    over_budget = []
+    for case, candidate in CASES.items():
+        request = {"age": 72, "weight_kg": 60, "drugs": REGIMEN, "candidate": candidate}
+        answer = dispense_gate(request, kb)
+        samples = bench(request, kb, args.rounds)
+        p99 = percentile(samples, 0.99)
+        print(f"{case:<18} {answer.get('reason', 'allowed'):<12} {percentile(samples, 0.5):>8.4f} "
+              f"{p99:>8.4f} {max(samples):>8.4f}")
+        if p99 > P99_BUDGET_MS:
+            over_budget.append(case)
+
+    if over_budget:
+        print(f"p99 over {P99_BUDGET_MS}ms: {', '.join(over_budget)}", file=sys.stderr)
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import time
+
+import msgpack
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from fastapi.responses import JSONResponse
+
+from extraction import extract_many
+from engine import PatientProfile, comprehensive_analysis
+
+ROUNDS = 2000
+
+DRUGS = ["paracetamol", "ibuprofen", "aspirin", "warfarin", "metformin", "alcohol"]
+
+
+def build_profile(n_drugs):
+    return {
+        "age": 72,
+        "drugs": [
+            {"name": DRUGS[i % len(DRUGS)], "dosage": f"{250 * (i % 4 + 1)}mg", "frequency": "every 6 hours"}
+            for i in range(n_drugs)
+        ],
+        "medical_conditions": ["hypertension", "diabetes"]
+    }
+
+
+def build_batch(n_docs):
+    documents = [
+        {"id": f"doc-{i}", "text": "Patient prescribed paracetamol 500mg every 6 hours and ibuprofen 200mg daily"}
+        for i in range(n_docs)
+    ]
+    drugs = extract_many([doc["text"] for doc in documents])
+    results = [{"id": doc["id"], "drugs": d} for doc, d in zip(documents, drugs)]
+    return {"documents": documents}, results
+
+
+def cpu_time(fn, rounds=ROUNDS):
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds * 1e6
+
+
+def compare(label, request, response, rounds=ROUNDS):
+    """Print bytes and per-call CPU for encoding and decoding a request/response pair"""
+    json_request = json.dumps(request).encode()
+    json_response = JSONResponse(response).body
+    msgpack_request = msgpack.packb(request)
+    msgpack_response = msgpack.packb(response)
+
+    rows = [
+        ("JSON", len(json_request), len(json_response),
+         cpu_time(lambda: json.loads(json_request), rounds) + cpu_time(lambda: JSONResponse(response).body, rounds),
+         cpu_time(lambda: json.dumps(request), rounds) + cpu_time(lambda: json.loads(json_response), rounds)),
+        ("MessagePack", len(msgpack_request), len(msgpack_response),
+         cpu_time(lambda: msgpack.unpackb(msgpack_request), rounds) + cpu_time(lambda: msgpack.packb(response), rounds),
+         cpu_time(lambda: msgpack.packb(request), rounds) + cpu_time(lambda: msgpack.unpackb(msgpack_response), rounds)),
+    ]
+
+    print(f"\n=== {label} ===")
+    print(f"{'format':<12} {'req bytes':>10} {'resp bytes':>11} {'server us':>10} {'client us':>10}")
+    for name, req_bytes, resp_bytes, server_us, client_us in rows:
+        print(f"{name:<12} {req_bytes:>10} {resp_bytes:>11} {server_us:>10.1f} {client_us:>10.1f}")
+    (_, jq, jr, js, jc), (_, mq, mr, ms, mc) = rows
+    print(f"savings: {1 - (mq + mr) / (jq + jr):.0%} bytes, "
+          f"{1 - ms / js:.0%} server CPU, {1 - mc / jc:.0%} client CPU")
+
+
+def main():
+    for n_drugs in (5, 40):
+        profile = build_profile(n_drugs)
+        result = comprehensive_analysis(PatientProfile(**profile))
+        compare(f"/comprehensive-analysis ({n_drugs} drugs)", profile, result)
+
+    batch, results = build_batch(500)
+    # The batch endpoint streams one record per document
+    compare("/extract-drugs/batch (500 documents)", batch, results, rounds=50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from extraction import chunked, default_chunksize, extract_many
+
+
+def load_documents(paths):
+    """Read documents from .jsonl files ({"id": ..., "text": ...} per line) or plain text files"""
+    documents = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        doc = json.loads(line)
+                        documents.append((str(doc["id"]), doc["text"]))
+        else:
+            with open(path, encoding="utf-8") as f:
+                documents.append((os.path.basename(path), f.read()))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract drugs from many documents in parallel")
+    parser.add_argument("paths", nargs="+", help="Text files or .jsonl files with id/text records")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--output", default="-", help="Output .jsonl file (default: stdout)")
+    args = parser.parse_args()
+
+    documents = load_documents(args.paths)
+    chunksize = args.chunksize or default_chunksize(len(documents), args.workers)
+    chunks = chunked(documents, chunksize)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            texts = ([text for _, text in chunk] for chunk in chunks)
+            for chunk, extracted in zip(chunks, pool.map(extract_many, texts)):
+                for (doc_id, _), drugs in zip(chunk, extracted):
+                    out.write(json.dumps({"id": doc_id, "drugs": drugs}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,42 @@
 import streamlit as st
 import requests
 import json
+import os
+import sys
 from typing import List, Dict
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+from websockets.exceptions import WebSocketException
+from websockets.sync.client import connect
 
-# API Configuration
-API_BASE_URL = "http://localhost:8000"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from client import AnalysisClient, AnalysisError
+from extraction import ExtractionSession
+from tracing import TRACEPARENT_HEADER, tracer
+
+# API Configuration: MEDISAFE_MODE=embedded runs the analysis engine in this process
+analysis_client = AnalysisClient()
+API_BASE_URL = analysis_client.base_url
+WS_BASE_URL = API_BASE_URL.replace("http", "ws", 1)
+
+# Lists are shown as tables; they scroll past this height
+TABLE_MAX_HEIGHT = 420
+TABLE_HEADER_HEIGHT = 38
+TABLE_ROW_HEIGHT = 35
+
+DRUG_COLUMNS = {"name": "Drug", "dosage": "Dosage", "frequency": "Frequency"}
+INTERACTION_COLUMNS = {"severity": "Severity", "drugs": "Drugs Involved", "description": "Risk"}
+RECOMMENDATION_COLUMNS = {"drug_name": "Drug", "recommended_dosage": "Recommended Dosage",
+                          "age_group": "Age Group", "warnings": "Warnings"}
+ALTERNATIVE_COLUMNS = {"name": "Alternative", "reason": "Reason", "dosage": "Dosage"}
+CONTRAINDICATION_COLUMNS = {"severity": "Severity", "drug": "Drug", "condition": "Condition", "reason": "Reason"}
+OVERDOSE_COLUMNS = {"drug": "Drug", "estimated_daily": "Current mg/day", "max_safe": "Max Safe mg/day", "warning": "Warning"}
+
+# Client spans go to TRACE_EXPORT_PATH and their trace context is sent to the API
+if not tracer.enabled:
+    tracer.configure_from_env("frontend")
 
 st.set_page_config(
     page_title="MediSafe - Drug Interaction Analysis",
@@ -96,53 +125,190 @@ st.markdown("""
 
 def call_api(endpoint: str, data: dict) -> dict:
     """Make API calls to the backend"""
-    try:
-        response = requests.post(f"{API_BASE_URL}/{endpoint}", json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"🚨 API Connection Error: {str(e)}")
-        return {}
-
-def create_severity_chart(interactions):
+    span = tracer.start_trace(f"call_api {endpoint}")
+    headers = {TRACEPARENT_HEADER: span.traceparent()} if span else {}
+    with tracer.activate(span):
+        try:
+            return analysis_client.call(endpoint, data, headers)
+        except AnalysisError as e:
+            if span:
+                span.status = "error"
+            st.error(f"🚨 API Connection Error: {str(e)}")
+            return {}
+
+def text_edit(old: str, new: str) -> tuple:
+    """Describe the change from old to new text as one (start, end, replacement) edit"""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+def sync_live_extraction(text: str) -> List[Dict]:
+    """Send text changes over the live extraction channel and return current mentions, in text order"""
+    state = st.session_state
+    if analysis_client.embedded:
+        # Same incremental scan, kept in this session instead of on the server
+        if "extract_session" not in state:
+            state.extract_session = ExtractionSession()
+        session = state.extract_session
+        if text != session.text:
+            start, end, replacement = text_edit(session.text, text)
+            session.apply_edit(start, end, replacement)
+        return list(session.mentions)
+
+    if state.get("extract_ws") is None:
+        state.extract_text = None
+        state.extract_mentions = {}
+
+    if text != state.extract_text:
+        if state.extract_text is None:
+            message = {"type": "reset", "text": text}
+        else:
+            start, end, replacement = text_edit(state.extract_text, text)
+            message = {"type": "edit", "start": start, "end": end, "text": replacement}
+
+        try:
+            if state.get("extract_ws") is None:
+                state.extract_ws = connect(f"{WS_BASE_URL}/ws/extract-drugs")
+            state.extract_ws.send(json.dumps(message))
+            delta = json.loads(state.extract_ws.recv())
+        except (OSError, WebSocketException) as e:
+            state.extract_ws = None
+            st.error(f"🚨 Live Extraction Error: {str(e)}")
+            return []
+
+        if delta["type"] == "error":
+            # Out of sync with the server, start over from the full text
+            state.extract_text = None
+            state.extract_mentions = {}
+            if message["type"] == "edit":
+                return sync_live_extraction(text)
+            st.error(f"🚨 Live Extraction Error: {delta['detail']}")
+            return []
+
+        if message["type"] == "edit":
+            # Mentions after the edit are shifted, not resent
+            shift = len(message["text"]) - (message["end"] - message["start"])
+            for mention in state.extract_mentions.values():
+                if mention["start"] >= message["end"]:
+                    mention["start"] += shift
+                    mention["end"] += shift
+        for mention_id in delta["removed"]:
+            state.extract_mentions.pop(mention_id, None)
+        for mention in delta["added"]:
+            state.extract_mentions[mention["id"]] = mention
+        state.extract_text = text if delta["length"] == len(text) else None
+
+    return sorted(state.extract_mentions.values(), key=lambda m: m["start"])
+
+def render_table(rows: List[Dict], columns: Dict[str, str]):
+    """Render records as one scrollable table rather than a widget per record"""
+    frame = pd.DataFrame(rows, columns=list(columns)).rename(columns=columns)
+    height = min(TABLE_MAX_HEIGHT, TABLE_HEADER_HEIGHT + TABLE_ROW_HEIGHT * max(len(rows), 1))
+    st.dataframe(frame, use_container_width=True, hide_index=True, height=height)
+
+def interaction_rows(interactions: List[Dict]) -> List[Dict]:
+    return [{**interaction, "drugs": ", ".join(interaction['drugs_involved'])} for interaction in interactions]
+
+def recommendation_rows(recommendations: List[Dict]) -> List[Dict]:
+    return [{**rec, "warnings": "; ".join(rec['warnings'])} for rec in recommendations]
+
+def create_severity_chart(severity_counts: Dict[str, int]):
     """Create severity distribution chart"""
-    if not interactions:
+    severity_counts = {severity: count for severity, count in severity_counts.items() if count}
+    if not severity_counts:
         return None
     
-    severity_counts = {}
-    for interaction in interactions:
-        severity = interaction['severity']
-        severity_counts[severity] = severity_counts.get(severity, 0) + 1
-    
     fig = px.pie(
         values=list(severity_counts.values()),
         names=list(severity_counts.keys()),
         title="Drug Interaction Severity Distribution",
+        color=list(severity_counts.keys()),
         color_discrete_map={'HIGH': '#e74c3c', 'MEDIUM': '#f39c12', 'LOW': '#27ae60'}
     )
     fig.update_layout(height=300)
     return fig
 
-def create_dosage_chart(recommendations):
-    """Create dosage comparison chart"""
-    if not recommendations:
+def create_dosage_chart(daily_doses: List[Dict]):
+    """Create current vs. maximum safe daily dose chart"""
+    if not daily_doses:
         return None
     
-    drugs = [rec['drug_name'] for rec in recommendations]
-    current_doses = []
-    recommended_doses = []
-    
-    for rec in recommendations:
-        current_doses.append(1)  # Placeholder
-        recommended_doses.append(1)  # Placeholder
+    drugs = [dose['drug'] for dose in daily_doses]
+    current_doses = [dose['current_daily_mg'] for dose in daily_doses]
+    max_doses = [dose['max_daily_mg'] for dose in daily_doses]
     
     fig = go.Figure(data=[
-        go.Bar(name='Current', x=drugs, y=current_doses, marker_color='#e74c3c'),
-        go.Bar(name='Recommended', x=drugs, y=recommended_doses, marker_color='#27ae60')
+        go.Bar(name='Current (mg/day)', x=drugs, y=current_doses, marker_color='#e74c3c'),
+        go.Bar(name='Max Safe (mg/day)', x=drugs, y=max_doses, marker_color='#27ae60')
     ])
-    fig.update_layout(barmode='group', title="Dosage Comparison", height=300)
+    fig.update_layout(barmode='group', title="Daily Dose vs. Maximum Safe Dose", height=300)
     return fig
 
+def render_analysis(analysis):
+    """Dashboard, charts and detail tables for a comprehensive analysis result"""
+    st.markdown("### 📊 Analysis Dashboard")
+
+    # Metrics Dashboard
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("👤 Patient Age", analysis["patient_age"])
+    with col2:
+        st.metric("💊 Drugs Analyzed", analysis["analyzed_drugs"])
+    with col3:
+        st.metric("⚠️ Interactions", len(analysis["interactions"]))
+    with col4:
+        overdose_count = len(analysis.get("overdose_warnings", []))
+        if overdose_count > 0:
+            st.metric("🚨 Overdoses", overdose_count, delta="CRITICAL")
+        else:
+            st.metric("✅ Overdoses", 0)
+
+    summary = analysis["summary"]
+    chart_col1, chart_col2 = st.columns(2)
+    with chart_col1:
+        chart = create_severity_chart(summary["interaction_severity_counts"])
+        if chart:
+            st.plotly_chart(chart, use_container_width=True)
+    with chart_col2:
+        chart = create_dosage_chart(summary["daily_doses"])
+        if chart:
+            st.plotly_chart(chart, use_container_width=True)
+
+    # Detailed Results
+    if analysis.get("overdose_warnings"):
+        st.markdown("### 🚨 CRITICAL: Overdose Warnings")
+        render_table(analysis["overdose_warnings"], OVERDOSE_COLUMNS)
+
+    # Interactions
+    with st.expander("⚠️ Drug Interactions Analysis", expanded=True):
+        if analysis["interactions"]:
+            render_table(interaction_rows(analysis["interactions"]), INTERACTION_COLUMNS)
+        else:
+            st.success("✅ No drug interactions found")
+
+    # Condition contraindications
+    with st.expander("🚫 Condition Contraindications", expanded=True):
+        if analysis.get("contraindications"):
+            render_table(analysis["contraindications"], CONTRAINDICATION_COLUMNS)
+        else:
+            st.success("✅ No contraindications for the listed conditions")
+
+    # Dosage Recommendations
+    with st.expander("📋 Dosage Recommendations", expanded=True):
+        render_table(recommendation_rows(analysis["dosage_recommendations"]), RECOMMENDATION_COLUMNS)
+
+    # Alternative Medications
+    with st.expander("🔄 Alternative Medications", expanded=True):
+        render_table(analysis["alternative_medications"], ALTERNATIVE_COLUMNS)
+
+    st.caption(f"📅 Analysis completed: {analysis['analysis_timestamp']}")
+
 def main():
     # Header
     st.markdown("""
@@ -156,6 +322,7 @@ def main():
     with st.sidebar:
         st.markdown("### 👤 Patient Information")
         patient_age = st.number_input("Patient Age", min_value=0, max_value=120, value=30, help="Enter patient's age for age-specific recommendations")
+        patient_weight = st.number_input("Patient Weight (kg)", min_value=0.0, max_value=300.0, value=None, help="Optional, enables weight-based dose limits")
         
         st.markdown("### 🏥 Medical History")
         conditions = st.text_area("Medical Conditions", placeholder="Enter conditions (one per line)\ne.g., Diabetes, Hypertension")
@@ -163,11 +330,14 @@ def main():
         
         st.markdown("### 📊 System Status")
         if st.button("🔄 Check API Status"):
-            try:
-                response = requests.get(f"{API_BASE_URL}/")
-                st.success("✅ API Connected")
-            except:
-                st.error("❌ API Disconnected")
+            if analysis_client.embedded:
+                st.success("✅ Embedded engine (no API needed)")
+            else:
+                try:
+                    response = requests.get(f"{API_BASE_URL}/")
+                    st.success("✅ API Connected")
+                except:
+                    st.error("❌ API Disconnected")
     
     # Initialize session state for drugs
     if 'drugs' not in st.session_state:
@@ -215,18 +385,19 @@ def main():
         with col2:
             st.markdown("#### 📋 Current Medication List")
             if st.session_state.drugs:
-                for i, drug in enumerate(st.session_state.drugs):
-                    st.markdown(f"""
-                    <div class="drug-card">
-                        <h4>💊 {drug['name'].title()}</h4>
-                        <p><strong>Dosage:</strong> {drug['dosage']}</p>
-                        <p><strong>Frequency:</strong> {drug['frequency']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if st.button(f"🗑️ Remove {drug['name']}", key=f"remove_{i}"):
-                        st.session_state.drugs.pop(i)
-                        st.rerun()
+                render_table(st.session_state.drugs, DRUG_COLUMNS)
+                
+                to_remove = st.multiselect(
+                    "Select medications to remove",
+                    options=range(len(st.session_state.drugs)),
+                    format_func=lambda i: f"{i + 1}. {st.session_state.drugs[i]['name']}"
+                )
+                if to_remove and st.button("🗑️ Remove Selected"):
+                    removed = set(to_remove)
+                    st.session_state.drugs = [
+                        drug for i, drug in enumerate(st.session_state.drugs) if i not in removed
+                    ]
+                    st.rerun()
             else:
                 st.info("📝 No medications added yet")
             
@@ -242,33 +413,23 @@ def main():
                 patient_data = {
                     "age": patient_age,
                     "drugs": st.session_state.drugs,
-                    "medical_conditions": medical_conditions
+                    "medical_conditions": medical_conditions,
+                    "weight_kg": patient_weight
                 }
                 
-                interactions = call_api("analyze-interactions", patient_data)
+                # The comprehensive result carries the server-side severity counts
+                result = call_api("comprehensive-analysis", patient_data)
+                interactions = result["interactions"] if result else []
                 
                 if interactions:
                     st.markdown(f"### 🚨 Found {len(interactions)} Drug Interactions")
                     
                     # Create severity chart
-                    chart = create_severity_chart(interactions)
+                    chart = create_severity_chart(result["summary"]["interaction_severity_counts"])
                     if chart:
                         st.plotly_chart(chart, use_container_width=True)
                     
-                    for interaction in interactions:
-                        severity_color = {
-                            "HIGH": "danger-card",
-                            "MEDIUM": "warning-card", 
-                            "LOW": "success-card"
-                        }.get(interaction["severity"], "warning-card")
-                        
-                        st.markdown(f"""
-                        <div class="{severity_color}">
-                            <h4>🚨 {interaction['severity']} SEVERITY INTERACTION</h4>
-                            <p><strong>Drugs Involved:</strong> {', '.join(interaction['drugs_involved'])}</p>
-                            <p><strong>Risk:</strong> {interaction['description']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    render_table(interaction_rows(interactions), INTERACTION_COLUMNS)
                 else:
                     st.markdown("""
                     <div class="success-card">
@@ -287,7 +448,8 @@ def main():
                 patient_data = {
                     "age": patient_age,
                     "drugs": st.session_state.drugs,
-                    "medical_conditions": medical_conditions
+                    "medical_conditions": medical_conditions,
+                    "weight_kg": patient_weight
                 }
                 
                 recommendations = call_api("dosage-recommendations", patient_data)
@@ -295,31 +457,11 @@ def main():
                 if recommendations:
                     st.markdown(f"### 📋 Dosage Analysis for Age Group: {recommendations[0]['age_group']}")
                     
-                    for rec in recommendations:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h4>💊 {rec['drug_name'].title()}</h4>
-                            <p><strong>Recommended Dosage:</strong> {rec['recommended_dosage']}</p>
-                            <p><strong>Age Group:</strong> {rec['age_group']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        if rec['warnings']:
-                            for warning in rec['warnings']:
-                                if "OVERDOSE" in warning or "REDUCE DOSAGE" in warning:
-                                    st.markdown(f"""
-                                    <div class="danger-card">
-                                        <h4>🚨 CRITICAL WARNING</h4>
-                                        <p>{warning}</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                                else:
-                                    st.markdown(f"""
-                                    <div class="warning-card">
-                                        <h4>⚠️ Caution</h4>
-                                        <p>{warning}</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
+                    critical = [w for rec in recommendations for w in rec['warnings'] if "OVERDOSE" in w]
+                    if critical:
+                        st.error("\n\n".join(f"🚨 {warning}" for warning in critical))
+                    
+                    render_table(recommendation_rows(recommendations), RECOMMENDATION_COLUMNS)
                 else:
                     st.info("📝 No specific dosage recommendations available")
             else:
@@ -333,30 +475,18 @@ def main():
                 patient_data = {
                     "age": patient_age,
                     "drugs": st.session_state.drugs,
-                    "medical_conditions": medical_conditions
+                    "medical_conditions": medical_conditions,
+                    "weight_kg": patient_weight
                 }
                 
                 alternatives = call_api("alternative-medications", patient_data)
                 
                 if alternatives:
                     st.markdown("### 💡 Recommended Alternative Medications")
-                    for alt in alternatives:
-                        if "OVERDOSE DETECTED" in alt['reason']:
-                            st.markdown(f"""
-                            <div class="danger-card">
-                                <h4>🚨 {alt['name'].title()} (SAFER ALTERNATIVE)</h4>
-                                <p><strong>Reason:</strong> {alt['reason']}</p>
-                                <p><strong>Safe Dosage:</strong> {alt['dosage']}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div class="success-card">
-                                <h4>💊 {alt['name'].title()}</h4>
-                                <p><strong>Reason:</strong> {alt['reason']}</p>
-                                <p><strong>Dosage:</strong> {alt['dosage']}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                    overdose_count = sum("OVERDOSE DETECTED" in alt['reason'] for alt in alternatives)
+                    if overdose_count:
+                        st.error(f"🚨 {overdose_count} alternative(s) suggested because of a detected overdose")
+                    render_table(alternatives, ALTERNATIVE_COLUMNS)
                 else:
                     st.info("📝 No alternative medications found")
             else:
@@ -371,29 +501,40 @@ def main():
             height=150
         )
         
-        if st.button("🤖 Extract Drug Information", type="primary"):
-            if medical_text:
-                extracted_drugs = call_api("extract-drugs", {"text": medical_text})
+        if medical_text:
+            mentions = sync_live_extraction(medical_text)
+            extracted_drugs = [
+                {"name": m["name"], "dosage": m["dosage"], "frequency": m["frequency"]}
+                for m in mentions
+            ]
+            
+            if extracted_drugs:
+                st.markdown("### ✅ Extracted Drug Information")
+                render_table(extracted_drugs, DRUG_COLUMNS)
                 
-                if extracted_drugs:
-                    st.markdown("### ✅ Extracted Drug Information")
-                    for drug in extracted_drugs:
-                        st.markdown(f"""
-                        <div class="success-card">
-                            <h4>💊 {drug['name'].title()}</h4>
-                            <p><strong>Dosage:</strong> {drug['dosage']}</p>
-                            <p><strong>Frequency:</strong> {drug['frequency']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
+                col1, col2 = st.columns(2)
+                with col1:
                     if st.button("➕ Add Extracted Drugs to Analysis"):
                         st.session_state.drugs.extend(extracted_drugs)
                         st.success("✅ Drugs added to analysis!")
                         st.rerun()
-                else:
-                    st.warning("⚠️ No drug information could be extracted")
+                with col2:
+                    analyze_clicked = st.button("🚀 Analyze This Prescription", type="primary")
+                
+                if analyze_clicked:
+                    # One request: extraction and the full analysis of what was extracted
+                    result = call_api("analyze-text", {
+                        "text": medical_text,
+                        "age": patient_age,
+                        "medical_conditions": medical_conditions,
+                        "weight_kg": patient_weight
+                    })
+                    if result:
+                        render_analysis(result["analysis"])
             else:
-                st.warning("⚠️ Please enter medical text")
+                st.warning("⚠️ No drug information could be extracted")
+        else:
+            st.info("📝 Drug information is extracted as you edit the text")
     
     # Comprehensive Analysis Section
     st.markdown("---")
@@ -404,99 +545,14 @@ def main():
             patient_data = {
                 "age": patient_age,
                 "drugs": st.session_state.drugs,
-                "medical_conditions": medical_conditions
+                "medical_conditions": medical_conditions,
+                "weight_kg": patient_weight
             }
             
             analysis = call_api("comprehensive-analysis", patient_data)
             
             if analysis:
-                st.markdown("### 📊 Analysis Dashboard")
-                
-                # Metrics Dashboard
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("👤 Patient Age", analysis["patient_age"])
-                with col2:
-                    st.metric("💊 Drugs Analyzed", analysis["analyzed_drugs"])
-                with col3:
-                    st.metric("⚠️ Interactions", len(analysis["interactions"]))
-                with col4:
-                    overdose_count = len(analysis.get("overdose_warnings", []))
-                    if overdose_count > 0:
-                        st.metric("🚨 Overdoses", overdose_count, delta="CRITICAL")
-                    else:
-                        st.metric("✅ Overdoses", 0)
-                
-                # Detailed Results
-                if analysis.get("overdose_warnings"):
-                    st.markdown("### 🚨 CRITICAL: Overdose Warnings")
-                    for warning in analysis["overdose_warnings"]:
-                        st.markdown(f"""
-                        <div class="danger-card">
-                            <h4>🚨 {warning['drug'].upper()} OVERDOSE DETECTED</h4>
-                            <p><strong>Warning:</strong> {warning['warning']}</p>
-                            <p><strong>Current Daily Dose:</strong> {warning['estimated_daily']}mg</p>
-                            <p><strong>Maximum Safe Dose:</strong> {warning['max_safe']}mg</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                # Interactions
-                with st.expander("⚠️ Drug Interactions Analysis", expanded=True):
-                    if analysis["interactions"]:
-                        for interaction in analysis["interactions"]:
-                            severity_class = {
-                                "HIGH": "danger-card",
-                                "MEDIUM": "warning-card",
-                                "LOW": "success-card"
-                            }.get(interaction["severity"], "warning-card")
-                            
-                            st.markdown(f"""
-                            <div class="{severity_class}">
-                                <h4>{interaction['severity']} SEVERITY</h4>
-                                <p>{interaction['description']}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.success("✅ No drug interactions found")
-                
-                # Dosage Recommendations
-                with st.expander("📋 Dosage Recommendations", expanded=True):
-                    for rec in analysis["dosage_recommendations"]:
-                        st.markdown(f"""
-                        <div class="metric-card">
-                            <h4>💊 {rec['drug_name'].title()}</h4>
-                            <p><strong>Recommended:</strong> {rec['recommended_dosage']}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        for warning in rec.get('warnings', []):
-                            if "OVERDOSE" in warning:
-                                st.error(f"🚨 {warning}")
-                            else:
-                                st.warning(f"⚠️ {warning}")
-                
-                # Alternative Medications
-                with st.expander("🔄 Alternative Medications", expanded=True):
-                    for alt in analysis["alternative_medications"]:
-                        if "OVERDOSE DETECTED" in alt['reason']:
-                            st.markdown(f"""
-                            <div class="danger-card">
-                                <h4>🚨 {alt['name'].title()} (CRITICAL ALTERNATIVE)</h4>
-                                <p><strong>Reason:</strong> {alt['reason']}</p>
-                                <p><strong>Safe Dosage:</strong> {alt['dosage']}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div class="success-card">
-                                <h4>💊 {alt['name'].title()}</h4>
-                                <p><strong>Reason:</strong> {alt['reason']}</p>
-                                <p><strong>Dosage:</strong> {alt['dosage']}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                
-                st.caption(f"📅 Analysis completed: {analysis['analysis_timestamp']}")
+                render_analysis(analysis)
         else:
             st.warning("⚠️ Please add medications first")
 
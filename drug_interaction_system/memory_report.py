@@ -0,0 +1,51 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from memprofile import ALLOCATION_BUDGETS, memory_report
+
+
+def print_report(report):
+    print(f"Resident memory: {report['resident_bytes'] or 0:,} bytes")
+    print("\nKnowledge base (bytes):")
+    for table, size in report["knowledge_base"].items():
+        print(f"  {table:<18} {size:>10,}")
+
+    if "hot_paths" in report:
+        print("\nPer-call allocations (bytes):")
+        print(f"  {'path':<26} {'peak':>10} {'retained':>10}   budget (peak / retained)")
+        for path, measured in report["hot_paths"].items():
+            budget = ALLOCATION_BUDGETS.get(path, {})
+            print(f"  {path:<26} {measured['peak_bytes']:>10,} {measured['retained_bytes']:>10,}   "
+                  f"{budget.get('peak_bytes', '-')} / {budget.get('retained_bytes', '-')}")
+            for stat in measured["top"][:3]:
+                if stat["size_diff"]:
+                    print(f"    {stat['size_diff']:>+8,}  {stat['location']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report knowledge base size and hot-path allocations")
+    parser.add_argument("--repeat", type=int, default=5, help="Calls measured per hot path")
+    parser.add_argument("--no-allocations", action="store_true", help="Only report resident sizes")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a hot path exceeds its budget")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = memory_report(allocations=not args.no_allocations or args.check, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    violations = report.get("budget_violations", [])
+    for violation in violations:
+        print(f"BUDGET EXCEEDED: {violation}", file=sys.stderr)
+    if args.check and violations:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
-import requests
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from client import add_client_arguments, client_from_args
 
 # Test overdose detection directly
 data = {
@@ -12,12 +18,15 @@ data = {
     ]
 }
 
+parser = argparse.ArgumentParser(description="Run one overdose analysis")
+add_client_arguments(parser)
+client = client_from_args(parser.parse_args())
+
 try:
-    response = requests.post("http://localhost:8000/comprehensive-analysis", json=data)
-    result = response.json()
+    result = client.call("comprehensive-analysis", data)
     
     print("Response:", result)
     print("Overdose warnings:", result.get("overdose_warnings", []))
     
 except Exception as e:
-    print("Error:", e)
\ No newline at end of file
+    print("Error:", e)
@@ -1,9 +1,12 @@
-import requests
-import json
+import argparse
+import os
+import sys
 
-def test_overdose():
-    url = "http://localhost:8000/comprehensive-analysis"
-    
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from client import add_client_arguments, client_from_args
+
+def test_overdose(client):
     # Test case with overdosage
     test_data = {
         "age": 35,
@@ -17,8 +20,7 @@ def test_overdose():
     }
     
     try:
-        response = requests.post(url, json=test_data)
-        result = response.json()
+        result = client.call("comprehensive-analysis", test_data)
         
         print("OVERDOSE TEST RESULTS")
         print("Patient Age:", result['patient_age'])
@@ -47,4 +49,6 @@ def test_overdose():
         return False
 
 if __name__ == "__main__":
-    test_overdose()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Overdose detection check")
+    add_client_arguments(parser)
+    test_overdose(client_from_args(parser.parse_args()))
@@ -1,9 +1,12 @@
-import requests
-import json
+import argparse
+import os
+import sys
 
-API_URL = "http://localhost:8000"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
 
-def test_overdose():
+from client import add_client_arguments, client_from_args
+
+def test_overdose(client):
     print("=== TESTING OVERDOSE DETECTION ===")
     data = {
         "age": 35,
@@ -12,8 +15,7 @@ def test_overdose():
         ]
     }
     
-    response = requests.post(f"{API_URL}/comprehensive-analysis", json=data)
-    result = response.json()
+    result = client.call("comprehensive-analysis", data)
     
     print("Overdose Warnings:", len(result.get("overdose_warnings", [])))
     print("Alternatives:", len(result.get("alternative_medications", [])))
@@ -27,12 +29,11 @@ def test_overdose():
     
     return result
 
-def test_text_extraction():
+def test_text_extraction(client):
     print("\n=== TESTING TEXT EXTRACTION ===")
     data = {"text": "Patient prescribed paracetamol 500mg every 6 hours and ibuprofen 200mg daily"}
     
-    response = requests.post(f"{API_URL}/extract-drugs", json=data)
-    result = response.json()
+    result = client.call("extract-drugs", data)
     
     print("Extracted drugs:", len(result))
     for drug in result:
@@ -40,7 +41,7 @@ def test_text_extraction():
     
     return result
 
-def test_normal_dose():
+def test_normal_dose(client):
     print("\n=== TESTING NORMAL DOSE ===")
     data = {
         "age": 35,
@@ -49,8 +50,7 @@ def test_normal_dose():
         ]
     }
     
-    response = requests.post(f"{API_URL}/comprehensive-analysis", json=data)
-    result = response.json()
+    result = client.call("comprehensive-analysis", data)
     
     print("Overdose Warnings:", len(result.get("overdose_warnings", [])))
     print("Should be 0 for normal dose")
@@ -58,11 +58,15 @@ def test_normal_dose():
     return result
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overdose, extraction and normal-dose checks")
+    add_client_arguments(parser)
+    client = client_from_args(parser.parse_args())
     try:
-        test_overdose()
-        test_text_extraction()
-        test_normal_dose()
+        test_overdose(client)
+        test_text_extraction(client)
+        test_normal_dose(client)
         print("\n✅ ALL TESTS COMPLETED")
     except Exception as e:
         print(f"❌ ERROR: {e}")
-        print("Make sure API is running: python api/main.py")
\ No newline at end of file
+        if not client.embedded:
+            print("Make sure API is running: python api/main.py")
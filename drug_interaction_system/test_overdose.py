@@ -1,10 +1,13 @@
-import requests
-import json
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from client import add_client_arguments, client_from_args
 
 # Test overdosage detection
-def test_overdose():
-    url = "http://localhost:8000/comprehensive-analysis"
-    
+def test_overdose(client):
     # Test case with overdosage
     test_data = {
         "age": 35,
@@ -24,8 +27,7 @@ def test_overdose():
     }
     
     try:
-        response = requests.post(url, json=test_data)
-        result = response.json()
+        result = client.call("comprehensive-analysis", test_data)
         
         print("=== OVERDOSE TEST RESULTS ===")
         print(f"Patient Age: {result['patient_age']}")
@@ -55,7 +57,11 @@ def test_overdose():
         return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overdose detection check")
+    add_client_arguments(parser)
+    client = client_from_args(parser.parse_args())
     print("Testing overdosage detection...")
-    print("Make sure the API is running on localhost:8000")
+    if client.embedded:
+        print("Running the engine in-process (pass --remote to use the API on localhost:8000)")
     print()
-    test_overdose()
\ No newline at end of file
+    test_overdose(client)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from knowledge_base import get_knowledge_base, set_knowledge_base
+
+
+@pytest.fixture(autouse=True)
+def restore_knowledge_base():
+    """Tests may swap the process-wide knowledge base; put the original back afterwards."""
+    kb = get_knowledge_base()
+    yield
+    set_knowledge_base(kb)
+
+
+@pytest.fixture
+def patient():
+    return {
+        "age": 40,
+        "drugs": [
+            {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+            {"name": "aspirin", "dosage": "75mg", "frequency": "daily"}
+        ],
+        "medical_conditions": []
+    }
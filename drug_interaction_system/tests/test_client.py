@@ -0,0 +1,60 @@
+import argparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+import client as client_module
+import main
+from client import AnalysisClient, AnalysisError, add_client_arguments, client_from_args
+from tenants import TenantRegistry
+
+PATIENT = {"age": 40, "drugs": [{"name": "aspirin", "dosage": "75mg", "frequency": "daily"}]}
+TENANTS = {"north": {"restricted_drugs": ["codeine"],
+                     "interactions": [{"drugs": ["aspirin", "paracetamol"], "severity": "LOW", "description": "x"}]}}
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    monkeypatch.setattr(main, "tenant_registry", TenantRegistry(TENANTS))
+    monkeypatch.setattr(client_module, "load_tenants", lambda: TenantRegistry(TENANTS))
+    api = TestClient(main.app)
+
+    def remote(endpoint, data, headers=None, params=None):
+        return api.post(f"/{endpoint}", json=data, headers=headers or {}, params=params or {}).json()
+
+    return AnalysisClient(mode="embedded"), remote
+
+
+def test_query_parameters_match_the_api(clients):
+    embedded, remote = clients
+    for endpoint, params in (("safe-to-add", {"drug_class": "nsaid"}), ("dosing-timeline", {"window_hours": 48})):
+        assert embedded.call(endpoint, PATIENT, params=params) == remote(endpoint, PATIENT, params=params)
+    with pytest.raises(AnalysisError, match="Unknown drug class"):
+        embedded.call("safe-to-add", PATIENT, params={"drug_class": "antiviral"})
+    with pytest.raises(AnalysisError, match="window_hours"):
+        embedded.call("dosing-timeline", PATIENT, params={"window_hours": 1})
+    with pytest.raises(AnalysisError, match="Unknown parameter"):
+        embedded.call("comprehensive-analysis", PATIENT, params={"drug_class": "nsaid"})
+
+
+def test_tenant_header_matches_the_api(clients):
+    embedded, remote = clients
+    headers = {"X-Tenant-ID": "north"}
+    patient = {"age": 40, "drugs": [{"name": "aspirin"}, {"name": "paracetamol"}]}
+    assert embedded.call("analyze-interactions", patient, headers) == remote("analyze-interactions", patient, headers)
+    assert embedded.call("analyze-interactions", patient, headers) != embedded.call("analyze-interactions", patient)
+    candidates = embedded.call("safe-to-add", PATIENT, headers)["candidates"]
+    assert "codeine" not in [row["drug"] for row in candidates]
+    with pytest.raises(AnalysisError, match="Unknown tenant"):
+        embedded.call("analyze-interactions", patient, {"x-tenant-id": "east"})
+
+
+def test_script_mode_follows_medisafe_mode(monkeypatch):
+    parser = argparse.ArgumentParser()
+    add_client_arguments(parser)
+    monkeypatch.setattr(client_module, "ANALYSIS_MODE", "embedded")
+    assert client_from_args(parser.parse_args([])).mode == "embedded"
+    assert client_from_args(parser.parse_args(["--remote"])).mode == "remote"
+    monkeypatch.setattr(client_module, "ANALYSIS_MODE", "remote")
+    assert client_from_args(parser.parse_args([])).mode == "remote"
+    assert client_from_args(parser.parse_args(["--embedded"])).mode == "embedded"
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import httpx
+
+import engine
+import main
+from coalescing import SingleFlight
+
+CONCURRENT_REQUESTS = 8
+
+
+def test_single_flight_shares_running_work():
+    flight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert asyncio.run(run()) == [1] * 5
+    assert flight.stats() == {"started": 1, "coalesced": 4, "failed": 0, "in_flight": 0}
+
+
+def test_concurrent_identical_requests_coalesce(monkeypatch, patient):
+    flight = SingleFlight()
+    monkeypatch.setattr(main, "analysis_flight", flight)
+    analyze = engine.comprehensive_analysis
+    calls = 0
+
+    def slow_analysis(*args):
+        # Hold the computation until every other request has joined it. This can
+        # only happen while the event loop keeps serving requests during the work.
+        nonlocal calls
+        calls += 1
+        deadline = time.monotonic() + 5
+        while flight.coalesced < CONCURRENT_REQUESTS - 1 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return analyze(*args)
+
+    monkeypatch.setattr(engine, "comprehensive_analysis", slow_analysis)
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post("/comprehensive-analysis", json=patient)
+                                          for _ in range(CONCURRENT_REQUESTS)))
+
+    responses = asyncio.run(run())
+    assert all(response.status_code == 200 for response in responses)
+    assert calls == 1
+    assert flight.coalesced == CONCURRENT_REQUESTS - 1
+    assert flight.started == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from dosage_rules import compile_dosage_rules
+from knowledge_base import get_knowledge_base
+
+SPEC = {
+    "age_bands": [
+        {"name": "child", "max_age": 12},
+        {"name": "adult", "max_age": 64},
+        {"name": "senior"}
+    ],
+    "warnings": [
+        {"min_age": 65, "message": "Senior"},
+        {"min_age": 13, "max_weight_kg": 50, "message": "Low weight"}
+    ],
+    "drugs": {
+        "Examplol": {
+            "child": {"dosage": "10mg/kg", "max_daily": 1000, "max_daily_mg_per_kg": 20},
+            "adult": {"dosage": "500mg", "max_daily": 2000},
+            "senior": {"dosage": "Not recommended", "max_daily": 1000, "warnings": ["Avoid in seniors"]}
+        }
+    }
+}
+
+
+def test_age_bands_and_weight_limits():
+    tables = compile_dosage_rules(SPEC)
+    assert [tables.band_name(age) for age in (0, 12, 13, 64, 65, 200)] == \
+        ["child", "child", "adult", "adult", "senior", "senior"]
+    assert tables.max_daily("examplol", 8) == 1000
+    assert tables.max_daily("examplol", 8, weight_kg=25) == 500
+    assert tables.max_daily("examplol", 8, weight_kg=80) == 1000
+    assert tables.max_daily("examplol", 40, weight_kg=25) == 2000
+    assert tables.max_daily("unknown", 40) == 0
+
+
+def test_warning_triggers():
+    tables = compile_dosage_rules(SPEC)
+    assert tables.patient_warnings(70) == ["Senior"]
+    assert tables.patient_warnings(40, weight_kg=45) == ["Low weight"]
+    assert tables.patient_warnings(10, weight_kg=45) == []
+    assert tables.patient_warnings(40) == []
+    assert tables.drug_warnings("examplol", 70) == ("Avoid in seniors",)
+    assert tables.drug_warnings("examplol", 40) == ()
+
+
+def test_unknown_band_rejected():
+    spec = {**SPEC, "drugs": {"examplol": {"teen": {"max_daily": 1}}}}
+    with pytest.raises(ValueError, match="teen"):
+        compile_dosage_rules(spec)
+
+
+def test_shipped_rules_keep_flat_limits():
+    tables = get_knowledge_base().dosage_tables
+    limits = {"paracetamol": 4000, "ibuprofen": 1200, "aspirin": 325}
+    for age in range(0, 121):
+        for weight_kg in (None, 10, 30, 45, 90):
+            for drug, limit in limits.items():
+                assert tables.max_daily(drug, age, weight_kg) == limit
+                assert tables.drug_warnings(drug, age) == ()
+            assert tables.patient_warnings(age, weight_kg) == \
+                (["Elderly patient - monitor for side effects"] if age >= 65 else []) + \
+                (["Pediatric dosing required"] if age <= 12 else [])
@@ -0,0 +1,85 @@
+import random
+
+from fastapi.testclient import TestClient
+
+import main
+from engine import analyze_text, comprehensive_analysis, extract_drugs
+from extraction import ExtractionSession
+
+TEXT = "Patient takes paracetamol 1000mg every 6 hours, then aspirin 75mg daily; ibuprofen 200mg."
+
+
+def test_overlapping_patterns_give_one_drug_per_mention():
+    drugs = extract_drugs("Patient takes paracetamol 1000mg every 6 hours")
+    assert drugs == [{"name": "paracetamol", "dosage": "1000mg", "frequency": "every 6 hours"}]
+    assert [d["name"] for d in extract_drugs(TEXT)] == ["paracetamol", "aspirin", "ibuprofen"]
+
+
+def test_extracted_regimen_has_no_false_overdose():
+    analysis = comprehensive_analysis({"age": 40, "drugs": extract_drugs("Patient takes paracetamol 1000mg every 6 hours")})
+    assert analysis["overdose_warnings"] == []
+    assert analysis["summary"]["daily_doses"][0]["current_daily_mg"] == 4000
+
+
+def test_session_matches_full_extraction_after_edits():
+    rng = random.Random(7)
+    session = ExtractionSession()
+    session.reset(TEXT)
+    assert session.drugs() == extract_drugs(TEXT)
+    pieces = ["paracetamol 500mg every 4 hours", " 20mg", ", ", "take codeine 30mg", "x", ""]
+    for _ in range(300):
+        start = rng.randint(0, len(session.text))
+        end = rng.randint(start, min(len(session.text), start + 12))
+        session.apply_edit(start, end, rng.choice(pieces))
+        assert session.drugs() == extract_drugs(session.text)
+
+
+def test_daily_frequency_tokens_are_kept():
+    assert extract_drugs("paracetamol 1500mg tid, aspirin 75mg once daily") == [
+        {"name": "paracetamol", "dosage": "1500mg", "frequency": "tid"},
+        {"name": "aspirin", "dosage": "75mg", "frequency": "once daily"}
+    ]
+
+
+def test_analyze_text_uses_parsed_mentions(monkeypatch):
+    import timeline
+
+    def no_parsing(*args):
+        raise AssertionError("dosage or frequency parsed again")
+
+    monkeypatch.setattr(timeline, "parse_frequency", no_parsing)
+    monkeypatch.setattr(timeline, "extract_dosage_amount", no_parsing)
+    result = analyze_text("paracetamol 1500mg tid and ibuprofen 0.4g every 8 hours", 40)
+    assert [(w["drug"], w["estimated_daily"]) for w in result["analysis"]["overdose_warnings"]] == \
+        [("paracetamol", 4500)]
+    assert [d["current_daily_mg"] for d in result["analysis"]["summary"]["daily_doses"]] == [1200, 4500]
+
+
+def test_analyze_text_endpoint_exposes_drug_fields_only():
+    client = TestClient(main.app)
+    result = client.post("/analyze-text", json={"text": "paracetamol 1500mg tid", "age": 40}).json()
+    assert result["extracted_drugs"] == [{"name": "paracetamol", "dosage": "1500mg", "frequency": "tid"}]
+    assert result["analysis"]["overdose_warnings"][0]["estimated_daily"] == 4500
+
+
+def test_live_extraction_reports_bad_frames():
+    with TestClient(main.app).websocket_connect("/ws/extract-drugs") as ws:
+        for frame in ("not json", "[1, 2]", '{"type": "edit", "start": 5, "end": 1}', '{"type": "reset", "text": 5}'):
+            ws.send_text(frame)
+            assert ws.receive_json()["type"] == "error"
+        # The connection survives and keeps working
+        ws.send_json({"type": "reset", "text": "aspirin 75mg daily"})
+        delta = ws.receive_json()
+        assert [m["name"] for m in delta["added"]] == ["aspirin"]
+
+
+def test_spans_index_the_original_text():
+    # "İ" lowercases to two characters; spans must still point into the text as given
+    text = "İİ Aspirin 75MG Daily"
+    session = ExtractionSession()
+    mention = session.reset(text)["added"][0]
+    assert text[mention["start"]:mention["end"]] == "Aspirin 75MG Daily"
+    assert (mention["name"], mention["dosage"], mention["frequency"]) == ("aspirin", "75mg", "daily")
+    session.apply_edit(0, 2, "")
+    assert session.drugs() == extract_drugs("Aspirin 75MG Daily")
+    assert session.mentions[0]["start"] == 1
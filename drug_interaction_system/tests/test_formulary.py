@@ -0,0 +1,30 @@
+from engine import safe_to_add
+from knowledge_base import get_knowledge_base
+
+
+def candidates(patient, kb=None):
+    return safe_to_add(patient, kb=kb or get_knowledge_base())["candidates"]
+
+
+def test_interaction_only_names_are_not_candidates():
+    patient = {"age": 40, "drugs": [{"name": "warfarin"}]}
+    names = [row["drug"] for row in candidates(patient)]
+    assert "alcohol" not in names
+    assert {"ibuprofen", "paracetamol", "co-codamol"} <= set(names)
+    assert "warfarin" not in names
+
+
+def test_candidates_ranked_by_severity_order():
+    patient = {"age": 40, "drugs": [{"name": "aspirin"}]}
+    rows = candidates(patient)
+    severities = [row["worst_severity"] for row in rows]
+    assert severities.index("MEDIUM") < severities.index("HIGH")
+    assert {row["drug"]: row["worst_severity"] for row in rows}["warfarin"] == "HIGH"
+    assert rows[0]["safe"]
+
+
+def test_unknown_severity_ranked_after_high():
+    kb = get_knowledge_base().with_interaction("aspirin", "caffeine", {"severity": "SEVERE", "description": "x"})
+    rows = candidates({"age": 40, "drugs": [{"name": "aspirin"}]}, kb)
+    assert rows[-1]["drug"] == "caffeine"
+    assert rows[-1]["worst_severity"] == "SEVERE"
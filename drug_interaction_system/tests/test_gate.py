@@ -0,0 +1,101 @@
+import random
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from engine import dispense_gate, overdose_warnings
+from knowledge_base import get_knowledge_base
+from tenants import TenantRegistry
+
+REGIMEN = [
+    {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+    {"name": "co-codamol", "dosage": "2 tablets", "frequency": "every 6 hours"}
+]
+
+
+def gate(candidate, drugs=REGIMEN, age=40, **extra):
+    return dispense_gate({"age": age, "drugs": drugs, "candidate": candidate, **extra})
+
+
+def test_allowed():
+    assert gate({"name": "metformin", "dosage": "500mg", "frequency": "twice daily"}) == {"allowed": True}
+
+
+def test_high_interaction_blocks():
+    verdict = gate({"name": "Aspirin", "dosage": "75mg", "frequency": "daily"})
+    assert verdict["allowed"] is False
+    assert (verdict["reason"], verdict["drug"], verdict["with"], verdict["severity"]) == \
+        ("interaction", "aspirin", "warfarin", "HIGH")
+
+
+def test_medium_interaction_does_not_block():
+    assert gate({"name": "ibuprofen", "dosage": "200mg", "frequency": "every 8 hours"},
+                drugs=[{"name": "aspirin", "dosage": "75mg", "frequency": "daily"}]) == {"allowed": True}
+
+
+def test_overdose_counts_shared_ingredients():
+    # co-codamol already supplies 4000mg paracetamol a day
+    verdict = gate({"name": "paracetamol", "dosage": "500mg", "frequency": "once daily"})
+    assert verdict["allowed"] is False
+    assert (verdict["reason"], verdict["ingredient"], verdict["max_daily_mg"]) == ("overdose", "paracetamol", 4000)
+    assert verdict["daily_mg"] == 4500
+
+
+def test_overdose_verdicts_match_timeline():
+    rng = random.Random(3)
+    names = ["paracetamol", "co-codamol", "panadol extra", "ibuprofen", "nurofen", "aspirin", "caffeine"]
+    doses = ["250mg", "500mg", "1000mg", "1 tablet", "2 tablets"]
+    frequencies = ["once daily", "twice daily", "every 4 hours", "every 6 hours", "every 8 hours"]
+    kb = get_knowledge_base()
+    for _ in range(300):
+        drugs = [{"name": rng.choice(names), "dosage": rng.choice(doses), "frequency": rng.choice(frequencies)}
+                 for _ in range(rng.randint(0, 3))]
+        candidate = {"name": rng.choice(names), "dosage": rng.choice(doses), "frequency": rng.choice(frequencies)}
+        age = rng.choice([8, 40, 70])
+        verdict = dispense_gate({"age": age, "drugs": drugs, "candidate": candidate}, kb)
+        expected = overdose_warnings({"age": age, "drugs": drugs + [candidate]}, kb)
+        before = overdose_warnings({"age": age, "drugs": drugs}, kb) if drugs else []
+        new_overdose = {w["drug"] for w in expected} - {w["drug"] for w in before}
+        if new_overdose:
+            assert verdict["allowed"] is False
+        if verdict.get("reason") == "overdose":
+            assert verdict["ingredient"] in {w["drug"] for w in expected}
+
+
+@pytest.mark.parametrize("body", [
+    {"drugs": [], "candidate": {"name": "aspirin"}},
+    {"age": "40", "drugs": [], "candidate": {"name": "aspirin"}},
+    {"age": 40, "drugs": {}, "candidate": {"name": "aspirin"}},
+    {"age": 40, "drugs": [{"dosage": "5mg"}], "candidate": {"name": "aspirin"}},
+    {"age": 40, "drugs": []},
+    [1, 2]
+])
+def test_malformed_requests_rejected(body):
+    assert TestClient(main.app).post("/dispense-gate", json=body).status_code == 422
+
+
+def test_endpoint_json_msgpack_and_tenant(monkeypatch):
+    monkeypatch.setattr(main, "tenant_registry", TenantRegistry({"north": {"dose_caps": {"aspirin": 250}}}))
+    client = TestClient(main.app)
+    body = {"age": 40, "drugs": [], "candidate": {"name": "aspirin", "dosage": "150mg", "frequency": "twice daily"}}
+    assert client.post("/dispense-gate", json=body).json() == {"allowed": True}
+    packed = client.post("/dispense-gate", content=msgpack.packb(body),
+                         headers={"Content-Type": "application/msgpack"})
+    assert packed.json() == {"allowed": True}
+    assert client.post("/dispense-gate", content=b"\xc1", headers={"Content-Type": "application/msgpack"}).status_code == 422
+
+    verdict = client.post("/dispense-gate", json=body, headers={"X-Tenant-ID": "north"}).json()
+    assert (verdict["reason"], verdict["max_daily_mg"]) == ("overdose", 250)
+
+
+def test_interactions_are_checked_by_ingredient():
+    # disprin is aspirin 300mg
+    verdict = gate({"name": "disprin", "dosage": "1 tablet", "frequency": "daily"})
+    assert (verdict["allowed"], verdict["reason"], verdict["with"], verdict["ingredients"]) == \
+        (False, "interaction", "warfarin", ["aspirin", "warfarin"])
+
+    verdict = gate({"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+                   drugs=[{"name": "disprin", "dosage": "1 tablet", "frequency": "daily"}])
+    assert (verdict["allowed"], verdict["with"], verdict["ingredients"]) == (False, "disprin", ["warfarin", "aspirin"])
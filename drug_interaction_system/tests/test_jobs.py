@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import engine
+import main
+from jobs import JOB_NICENESS, JobRunner, JobStore
+from knowledge_base import get_knowledge_base, set_knowledge_base
+
+PROFILE = {"age": 40, "drugs": [{"name": "paracetamol", "dosage": "500mg", "frequency": "every 6 hours"}]}
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_job_resumes_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    total = 95
+    store = JobStore(path)
+    job_id = store.submit([{**PROFILE, "age": age} for age in range(total)])
+
+    first_calls = []
+
+    def analyze_then_shut_down(profile):
+        first_calls.append(profile["age"])
+        if len(first_calls) == 25:
+            # Shutdown arrives mid-chunk; the worker finishes the chunk and leaves the job running
+            threading.Thread(target=runner.stop).start()
+        return {"age": profile["age"]}
+
+    runner = JobRunner(store, analyze_then_shut_down, chunk_size=10)
+    runner.start()
+    wait_for(lambda: runner.stats()["alive"] == 0)
+    assert store.get(job_id)["status"] == "running"
+    assert store.get(job_id)["completed"] == 30
+    store.close()
+
+    # A new process: same database, new store and runner
+    store = JobStore(path)
+    second_calls = []
+
+    def analyze(profile):
+        second_calls.append(profile["age"])
+        return {"age": profile["age"]}
+
+    runner = JobRunner(store, analyze, chunk_size=10)
+    runner.start()
+    wait_for(lambda: store.get(job_id)["status"] == "completed")
+    runner.stop()
+
+    assert second_calls == list(range(30, total))
+    results = list(store.results(job_id))
+    assert [r["index"] for r in results] == list(range(total))
+    assert [r["result"]["age"] for r in results] == list(range(total))
+    store.close()
+
+
+def worker_info(profile):
+    return {"pid": os.getpid(), "niceness": os.nice(0)}
+
+
+def test_analyses_run_in_niced_worker_processes(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    runner = JobRunner(store, worker_info, processes=True)
+    runner.start()
+    try:
+        job_id = store.submit([PROFILE] * 3)
+        runner.notify()
+        wait_for(lambda: store.get(job_id)["status"] == "completed")
+    finally:
+        runner.stop()
+    results = [r["result"] for r in store.results(job_id)]
+    assert len(results) == 3
+    assert all(r["pid"] != os.getpid() for r in results)
+    assert all(r["niceness"] == min(os.nice(0) + JOB_NICENESS, 19) for r in results)
+    store.close()
+
+
+def test_worker_processes_follow_knowledge_base_updates(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    runner = JobRunner(store, engine.comprehensive_analysis, processes=True, knowledge_base=get_knowledge_base)
+    runner.start()
+    regimen = {"age": 40, "drugs": [{"name": "metformin"}, {"name": "ibuprofen"}]}
+    try:
+        before = store.submit([regimen])
+        runner.notify()
+        wait_for(lambda: store.get(before)["status"] == "completed")
+        set_knowledge_base(get_knowledge_base().with_interaction("metformin", "ibuprofen",
+                                                                 {"severity": "LOW", "description": "x"}))
+        after = store.submit([regimen])
+        runner.notify()
+        wait_for(lambda: store.get(after)["status"] == "completed")
+    finally:
+        runner.stop()
+    assert next(store.results(before))["result"]["interactions"] == []
+    assert next(store.results(after))["result"]["interactions"][0]["severity"] == "LOW"
+    store.close()
+
+
+def test_results_resume_from_offset(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit([PROFILE] * 5)
+    store.record_results(job_id, [(seq, {"result": seq}) for seq in range(5)])
+    assert [r["index"] for r in store.results(job_id, offset=3, batch_size=2)] == [3, 4]
+    store.close()
+
+
+def test_jobs_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    with TestClient(main.app) as client:
+        response = client.post("/jobs", json={"profiles": [PROFILE, PROFILE], "priority": 1})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        wait_for(lambda: client.get(f"/jobs/{job_id}").json()["status"] == "completed")
+        lines = client.get(f"/jobs/{job_id}/results").text.splitlines()
+        assert len(lines) == 2
+        assert client.get("/jobs/missing").status_code == 404
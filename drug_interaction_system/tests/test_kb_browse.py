@@ -0,0 +1,63 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import main
+from knowledge_base import get_knowledge_base, set_knowledge_base
+
+
+def pages(client, collection, limit, **params):
+    cursor = None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        body = client.get(f"/kb/{collection}", params=query).json()
+        yield body["items"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return
+
+
+def test_cursor_pages_cover_the_export_in_order():
+    client = TestClient(main.app)
+    for collection in ("drugs", "interactions", "dosage-rules"):
+        paged = [item for page in pages(client, collection, 2) for item in page]
+        exported = [json.loads(line) for line in client.get(f"/kb/{collection}/export").text.splitlines()]
+        assert paged == exported
+        assert len(paged) == client.get("/kb").json()["collections"][collection]
+
+
+def test_prefix_filters_pages():
+    client = TestClient(main.app)
+    names = [item["name"] for page in pages(client, "drugs", 1, prefix="co") for item in page]
+    assert names and all(name.startswith("co") for name in names)
+
+
+def test_etag_revalidation():
+    client = TestClient(main.app)
+    first = client.get("/kb/drugs", params={"limit": 3})
+    etag = first.headers["ETag"]
+    assert client.get("/kb/drugs", params={"limit": 3}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/kb", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/kb/drugs/export", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+
+    set_knowledge_base(get_knowledge_base().with_interaction("codeine", "alcohol",
+                                                             {"severity": "HIGH", "description": "Sedation"}))
+    changed = client.get("/kb/drugs", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_cursor_survives_knowledge_base_change():
+    client = TestClient(main.app)
+    first = client.get("/kb/interactions", params={"limit": 1}).json()
+    set_knowledge_base(get_knowledge_base().with_interaction("aardvarkine", "alcohol",
+                                                             {"severity": "LOW", "description": "x"}))
+    rest = client.get("/kb/interactions", params={"limit": 100, "cursor": first["next_cursor"]}).json()["items"]
+    assert first["items"][0] not in rest
+    assert all(item["drugs"] != ["aardvarkine", "alcohol"] for item in rest)
+
+
+def test_bad_cursor_and_collection():
+    client = TestClient(main.app)
+    assert client.get("/kb/drugs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/kb/patients").status_code == 404
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from knowledge_base import get_knowledge_base
+from rescreen import RegimenRegistry, changed_drugs
+from tenants import build_overlay
+
+
+def test_interaction_severity_must_be_canonical():
+    client = TestClient(main.app)
+    for severity in ("high", "SEVERE", ""):
+        response = client.post("/admin/kb/interactions",
+                               json={"drugs": ["metformin", "ibuprofen"], "severity": severity, "description": "x"})
+        assert response.status_code == 422
+    assert get_knowledge_base().interaction("metformin", "ibuprofen") is None
+
+
+def test_tenant_interaction_severity_must_be_canonical():
+    spec = {"interactions": [{"drugs": ["metformin", "ibuprofen"], "severity": "Severe", "description": "x"}]}
+    with pytest.raises(ValueError, match="severity"):
+        build_overlay(get_knowledge_base(), "acme", spec)
+
+
+def test_interaction_update_rescreens_affected_regimens(patient, monkeypatch):
+    monkeypatch.setattr(main, "regimen_registry", RegimenRegistry())
+    client = TestClient(main.app)
+    client.put("/regimens/a", json=patient)
+    client.put("/regimens/b", json={"age": 50, "drugs": [{"name": "metformin"}, {"name": "ibuprofen"}]})
+    since = client.get("/alerts").json()[-1]["seq"] if client.get("/alerts").json() else 0
+
+    response = client.post("/admin/kb/interactions",
+                           json={"drugs": ["ibuprofen", "metformin"], "severity": "HIGH", "description": "test"})
+    assert response.status_code == 200
+    assert response.json()["rescreened"] == 1
+    alerts = client.get(f"/alerts?since={since}").json()
+    assert [(a["regimen_id"], a["finding"]["severity"]) for a in alerts] == [("b", "HIGH")]
+
+
+def test_changed_drugs_follow_product_ingredients():
+    old = get_knowledge_base()
+    new = old.with_interaction("codeine", "alcohol", {"severity": "HIGH", "description": "Sedation"})
+    changed = changed_drugs(old, new)
+    assert {"codeine", "alcohol", "co-codamol"} <= changed
+    assert "ibuprofen" not in changed
@@ -0,0 +1,112 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from knowledge_base import get_knowledge_base
+from models import PatientProfile
+from shadow import ShadowEvaluator, diff_findings, shadow_findings
+from tenants import build_overlay
+
+PATIENT = PatientProfile(age=40, drugs=[
+    {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+    {"name": "paracetamol", "dosage": "500mg", "frequency": "every 6 hours"},
+    {"name": "ibuprofen", "dosage": "200mg", "frequency": "every 8 hours"},
+    {"name": "aspirin", "dosage": "75mg", "frequency": "daily"}
+])
+
+
+def wait_for(evaluator, count, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        report = evaluator.report()
+        if report["evaluated"] + report["errors"] >= count:
+            return report
+        time.sleep(0.01)
+    raise AssertionError(f"Shadow evaluated {evaluator.report()['evaluated']} of {count}")
+
+
+def test_diff_separates_new_removed_and_changed():
+    kb = get_knowledge_base()
+    candidate = kb.with_interaction("warfarin", "paracetamol", {"severity": "HIGH", "description": "INR"})
+    candidate = candidate.with_interaction("ibuprofen", "aspirin", {"severity": "HIGH", "description": "GI"})
+    diff = diff_findings(shadow_findings(PATIENT, kb), shadow_findings(PATIENT, candidate))
+    assert list(diff["new"]) == [("interaction", "paracetamol", "warfarin")]
+    assert list(diff["changed"]) == [("interaction", "aspirin", "ibuprofen")]
+    assert diff["removed"] == {}
+    assert diff_findings(shadow_findings(PATIENT, kb), shadow_findings(PATIENT, kb)) == \
+        {"new": {}, "removed": {}, "changed": {}}
+
+
+def test_evaluator_records_differences_per_tenant():
+    kb = get_knowledge_base()
+    candidate = kb.with_interaction("warfarin", "paracetamol", {"severity": "HIGH", "description": "INR"})
+    specs = {"north": {"interactions": [{"drugs": ["warfarin", "paracetamol"], "severity": "HIGH",
+                                         "description": "INR"}]}}
+    evaluator = ShadowEvaluator(kb, candidate, 1.0, specs)
+    try:
+        assert evaluator.offer("comprehensive-analysis", PATIENT, kb)
+        # The tenant already has the candidate's interaction, so nothing changes for it
+        assert evaluator.offer("comprehensive-analysis", PATIENT, build_overlay(kb, "north", specs["north"]))
+        report = wait_for(evaluator, 2)
+    finally:
+        evaluator.stop()
+    assert (report["evaluated"], report["differing"], report["errors"]) == (2, 1, 0)
+    assert report["by_change"] == {"interaction:new": 1}
+    assert report["top_findings"] == [{"change": "new", "kind": "interaction",
+                                       "subject": ["paracetamol", "warfarin"], "requests": 1}]
+    assert report["examples"][0]["new"][0]["severity"] == "HIGH"
+
+
+def test_saturated_shadow_drops_instead_of_queueing():
+    kb = get_knowledge_base()
+    candidate = kb.with_interaction("warfarin", "paracetamol", {"severity": "HIGH", "description": "INR"})
+    evaluator = ShadowEvaluator(kb, candidate, 1.0, workers=1, max_pending=2)
+    try:
+        start = time.perf_counter()
+        accepted = sum(evaluator.offer("comprehensive-analysis", PATIENT, kb) for _ in range(500))
+        elapsed = time.perf_counter() - start
+        report = wait_for(evaluator, accepted)
+    finally:
+        evaluator.stop()
+    assert report["sampled"] == 500
+    assert report["dropped"] == 500 - accepted
+    assert report["dropped"] >= 450
+    # Nothing beyond the pending slots was queued: every accepted request was evaluated
+    assert report["evaluated"] + report["errors"] == accepted
+    assert elapsed < 0.5
+
+
+def test_requests_against_a_reloaded_base_are_stale():
+    kb = get_knowledge_base()
+    evaluator = ShadowEvaluator(kb, kb.with_interaction("warfarin", "paracetamol",
+                                                        {"severity": "HIGH", "description": "INR"}), 1.0)
+    try:
+        reloaded = kb.with_interaction("metformin", "ibuprofen", {"severity": "LOW", "description": "x"})
+        assert not evaluator.offer("comprehensive-analysis", PATIENT, reloaded)
+    finally:
+        evaluator.stop()
+    assert (evaluator.report()["stale"], evaluator.report()["evaluated"]) == (1, 0)
+
+
+def test_shadow_endpoints():
+    client = TestClient(main.app)
+    bad = {"sample_rate": 1.0, "interactions": [{"drugs": ["warfarin", "paracetamol"], "severity": "high",
+                                                 "description": "INR"}]}
+    assert client.post("/admin/shadow", json=bad).status_code == 422
+    assert client.post("/admin/shadow", json={"sample_rate": 1.0}).status_code == 422
+
+    config = {"sample_rate": 1.0, "interactions": [{"drugs": ["warfarin", "paracetamol"], "severity": "HIGH",
+                                                    "description": "INR"}]}
+    assert client.post("/admin/shadow", json=config).status_code == 200
+    try:
+        client.post("/comprehensive-analysis", json=PATIENT.model_dump())
+        report = wait_for(main.shadow, 1)
+        assert report["by_endpoint"] == {"comprehensive-analysis": 1}
+        assert report["by_change"] == {"interaction:new": 1}
+    finally:
+        final = client.delete("/admin/shadow")
+    assert final.status_code == 200 and final.json()["running"] is False
+    assert client.get("/admin/shadow").status_code == 404
+    # The candidate was never promoted
+    assert get_knowledge_base().interaction("warfarin", "paracetamol") is None
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from knowledge_base import get_knowledge_base, set_knowledge_base
+from tenants import TenantRegistry
+
+SPECS = {
+    "north": {
+        "restricted_drugs": ["codeine"],
+        "interactions": [{"drugs": ["warfarin", "paracetamol"], "severity": "MEDIUM", "description": "Raised INR"}],
+        "dose_caps": {"paracetamol": {"65+": 2000}}
+    },
+    "south": {}
+}
+
+PATIENT = {
+    "age": 70,
+    "drugs": [
+        {"name": "warfarin", "dosage": "5mg", "frequency": "once daily"},
+        {"name": "paracetamol", "dosage": "1000mg", "frequency": "every 8 hours"}
+    ]
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "tenant_registry", TenantRegistry(SPECS))
+    return TestClient(main.app)
+
+
+def analyze(client, tenant=None):
+    headers = {"X-Tenant-ID": tenant} if tenant else {}
+    response = client.post("/comprehensive-analysis", json=PATIENT, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_tenant_changes_apply_only_with_its_header(client):
+    north = analyze(client, "north")
+    assert [i["drugs_involved"] for i in north["interactions"]] == [["warfarin", "paracetamol"]]
+    assert [w["drug"] for w in north["overdose_warnings"]] == ["paracetamol"]
+
+    for result in (analyze(client), analyze(client, "south")):
+        assert result["interactions"] == []
+        assert result["overdose_warnings"] == []
+
+
+def test_overlay_leaves_base_untouched(client):
+    base = get_knowledge_base()
+    analyze(client, "north")
+    assert base.interaction("warfarin", "paracetamol") is None
+    assert base.dosage_tables.max_daily("paracetamol", 70, None) == 4000
+    assert main.tenant_registry.loaded()["north"].dosage_tables.max_daily("paracetamol", 70, None) == 2000
+
+
+def test_restricted_drugs_are_not_suggested(client):
+    patient = {"age": 40, "drugs": [{"name": "aspirin"}]}
+    north = client.post("/safe-to-add", json=patient, headers={"X-Tenant-ID": "north"}).json()
+    base = client.post("/safe-to-add", json=patient).json()
+    assert "codeine" not in [row["drug"] for row in north["candidates"]]
+    assert "codeine" in [row["drug"] for row in base["candidates"]]
+
+
+def test_overlay_follows_base_reload(client):
+    analyze(client, "north")
+    set_knowledge_base(get_knowledge_base().with_interaction("warfarin", "ibuprofen",
+                                                             {"severity": "HIGH", "description": "Bleeding"}))
+    overlay = main.tenant_registry.knowledge_base("north", get_knowledge_base())
+    assert overlay.interaction("ibuprofen", "warfarin")["severity"] == "HIGH"
+    assert overlay.interaction("paracetamol", "warfarin")["severity"] == "MEDIUM"
+
+
+def test_unknown_tenant(client):
+    response = client.post("/comprehensive-analysis", json=PATIENT, headers={"X-Tenant-ID": "east"})
+    assert response.status_code == 404
@@ -0,0 +1,101 @@
+import random
+
+import numpy as np
+
+import engine
+from timeline import parse_frequency, rolling_exposure
+
+NAMES = ["paracetamol", "co-codamol", "ibuprofen", "aspirin", "codeine", "tylenol", "panadol extra", "nurofen"]
+FREQUENCIES = ["every 4 hours", "every 5 hours", "every 6 hours", "every 4-6 hours", "twice daily", "daily", "qid"]
+DOSAGES = ["200mg", "500mg", "1000mg", "1 tablet", "2 tablets", "400mg"]
+
+
+def profile(*drugs, age=40, weight_kg=None):
+    return {"age": age, "weight_kg": weight_kg,
+            "drugs": [{"name": name, "dosage": dosage, "frequency": frequency} for name, dosage, frequency in drugs]}
+
+
+def test_frequencies():
+    assert parse_frequency("every 4-6 hours") == 4
+    assert parse_frequency("three times a day") == 8
+    assert parse_frequency("bid") == 12
+    assert parse_frequency("weekly") == 168
+    assert parse_frequency("as needed") == 24
+
+
+def test_rolling_exposure_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        n = rng.randint(1, 6)
+        group = np.array([rng.randrange(3) for _ in range(n)])
+        interval = np.array([rng.choice([60, 240, 300, 360, 480, 720, 1440]) for _ in range(n)])
+        amount = np.array([float(rng.choice([100, 250, 500])) for _ in range(n)])
+        window = rng.choice([1440, 2880, 4320])
+        result = rolling_exposure(group, interval, amount, window, 3)
+        for g in range(3):
+            events = [(t, amount[i]) for i in range(n) if group[i] == g for t in range(0, window, interval[i])]
+            peak = max((sum(a for u, a in events if t <= u < t + 1440) for t, _ in events), default=0)
+            assert result["peak"][g] == peak
+
+
+def test_sections_agree_on_entry_overdose():
+    # 5 doses a day: 5000mg against a 4000mg limit
+    result = engine.comprehensive_analysis(profile(("paracetamol", "1000mg", "every 5 hours")))
+    assert [w["estimated_daily"] for w in result["overdose_warnings"]] == [5000]
+    assert any(w.startswith("OVERDOSE: 5000mg/day") for w in result["dosage_recommendations"][0]["warnings"])
+    assert all(alt["reason"].startswith("OVERDOSE DETECTED") for alt in result["alternative_medications"])
+    assert result["summary"]["daily_doses"] == [
+        {"drug": "paracetamol", "sources": ["paracetamol"], "current_daily_mg": 5000, "max_daily_mg": 4000}
+    ]
+
+
+def test_summary_reports_product_ingredients():
+    result = engine.comprehensive_analysis(profile(("paracetamol", "1000mg", "every 6 hours"),
+                                                   ("co-codamol", "2 tablets", "every 6 hours")))
+    doses = {row["drug"]: row for row in result["summary"]["daily_doses"]}
+    assert doses["paracetamol"]["current_daily_mg"] == 4000 + 8 * 500
+    assert doses["paracetamol"]["max_daily_mg"] == 4000
+    assert doses["paracetamol"]["sources"] == ["paracetamol", "co-codamol"]
+    assert "co-codamol" not in doses
+    flagged = [w for w in result["dosage_recommendations"][0]["warnings"] if w.startswith("OVERDOSE")]
+    assert flagged == [result["overdose_warnings"][0]["warning"]]
+
+
+def test_sections_agree_on_random_regimens():
+    rng = random.Random(11)
+    for _ in range(300):
+        drugs = [(rng.choice(NAMES), rng.choice(DOSAGES), rng.choice(FREQUENCIES)) for _ in range(rng.randint(1, 4))]
+        result = engine.comprehensive_analysis(profile(*drugs, age=rng.choice([8, 40, 75]),
+                                                       weight_kg=rng.choice([None, 30, 70])))
+        overdosed = {source for w in result["overdose_warnings"] for source in w["sources"]}
+
+        for rec in result["dosage_recommendations"]:
+            assert any(w.startswith("OVERDOSE") for w in rec["warnings"]) == (rec["drug_name"] in overdosed)
+        kb = engine.get_knowledge_base()
+        expected = [name in overdosed for name, _, _ in drugs for _ in kb.drug_alternatives(name)]
+        assert [alt["reason"].startswith("OVERDOSE DETECTED") for alt in result["alternative_medications"]] == expected
+        for row in result["summary"]["daily_doses"]:
+            over = bool(row["max_daily_mg"] and row["current_daily_mg"] > row["max_daily_mg"])
+            assert over == any(w["drug"] == row["drug"] for w in result["overdose_warnings"])
+
+
+def test_single_entry_check_uses_the_timeline():
+    check = engine.check_overdosage("paracetamol", "1000mg", "every 5 hours", 40)
+    assert check["is_overdose"] and check["estimated_daily"] == 5000
+    assert not engine.check_overdosage("paracetamol", "1000mg", "every 6 hours", 40)["is_overdose"]
+
+
+def test_dosage_units_are_converted_to_mg():
+    exposure = engine.ingredient_exposure(profile(("paracetamol", "1g", "every 6 hours"),
+                                                  ("paracetamol", "500 mg", "every 6 hours")))
+    assert [(row["ingredient"], row["peak_24h_mg"], row["is_overdose"]) for row in exposure] == \
+        [("paracetamol", 6000, True)]
+    micrograms = engine.ingredient_exposure(profile(("aspirin", "75000mcg", "daily")))
+    assert micrograms[0]["peak_24h_mg"] == 75
+    # A volume isn't a mass; the entry is not counted rather than counted as mg
+    assert engine.ingredient_exposure(profile(("paracetamol", "10ml", "every 6 hours"))) == []
+
+
+def test_gram_doses_from_text_are_flagged():
+    analysis = engine.analyze_text("Patient on paracetamol 1g every 4 hours", 40)["analysis"]
+    assert [(w["drug"], w["estimated_daily"]) for w in analysis["overdose_warnings"]] == [("paracetamol", 6000)]
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from tracing import JsonLinesExporter, SpanExporter, tracer
+
+
+@pytest.fixture
+def traced():
+    """Trace every request with the given exporter, restoring the tracer afterwards."""
+    saved = (tracer.service, tracer.exporter, tracer.sample_rate)
+
+    def configure(exporter):
+        tracer.service, tracer.exporter, tracer.sample_rate = "test", exporter, 1.0
+
+    yield configure
+    tracer.service, tracer.exporter, tracer.sample_rate = saved
+
+
+def test_base_exporter_discards_spans(traced, patient):
+    traced(SpanExporter())
+    response = TestClient(main.app).post("/analyze-interactions", json=patient)
+    assert response.status_code == 200
+
+
+def test_json_lines_exporter_writes_one_trace(traced, patient, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JsonLinesExporter(str(path))
+    traced(exporter)
+    TestClient(main.app).post("/comprehensive-analysis", json=patient)
+    exporter.shutdown()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len({span["trace_id"] for span in spans}) == 1
+    names = {span["name"] for span in spans}
+    assert {"handler", "interactions", "overdose"} <= names